@@ -0,0 +1,251 @@
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views import View
+
+from .caching import (
+    CATEGORIES_SCOPE, FEED_SCOPE, GLOBAL_SCOPE, LOCATIONS_SCOPE, author_scope,
+    category_scope, post_scope
+)
+from .constants import API_MAX_LIMIT, QUANTITY_ON_PAGINATE
+from .models import Category, Comment
+from .paginators import CursorPaginator
+from .querysets import (
+    add_filter_post_list, get_feed_queryset, get_visible_post_queryset
+)
+from .views import ConditionalGetMixin, PostScopesMixin
+
+
+User = get_user_model()
+
+# Поле ответа -> путь ORM. В SELECT попадают только запрошенные колонки
+# (и JOIN только нужных таблиц).
+POST_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'category': 'category__slug',
+    'category_title': 'category__title',
+    'location': 'location__name',
+    'image': 'image',
+    'comment_count': 'comment_count',
+}
+POST_DEFAULT_FIELDS = ('id', 'title', 'pub_date', 'author', 'category',
+                       'comment_count')
+# Категория и место публикации: от них зависит свежесть её ответа.
+RELATED_KEYS = ('category__slug', 'location_id')
+COMMENT_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'created_at': 'created_at',
+    'author': 'author__username',
+}
+COMMENT_DEFAULT_FIELDS = tuple(COMMENT_FIELDS)
+# Преобразования значений колонок в значения ответа.
+CONVERTERS = {
+    'image': lambda name: default_storage.url(name) if name else None,
+}
+
+
+class ApiError(Exception):
+    pass
+
+
+def error_response(message, status=400):
+    return JsonResponse({'error': message}, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def select_fields(request, available, default):
+    """Поля из `?fields=a,b`; неизвестное поле — ошибка запроса."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return default
+    names = tuple(dict.fromkeys(
+        name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in names if name not in available]
+    if unknown or not names:
+        raise ApiError(('Неизвестные поля: ' + ', '.join(unknown))
+                       if unknown else 'Пустой список полей.')
+    return names
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', QUANTITY_ON_PAGINATE))
+    except ValueError:
+        raise ApiError('limit должен быть целым числом.')
+    if not 1 <= limit <= API_MAX_LIMIT:
+        raise ApiError(f'limit должен быть от 1 до {API_MAX_LIMIT}.')
+    return limit
+
+
+def project(queryset, available, names, keys=()):
+    """
+    values() только по запрошенным полям и ключам сортировки.
+
+    Строки остаются словарями: экземпляры моделей не создаются.
+    """
+    paths = dict.fromkeys([*(available[name] for name in names), *keys])
+    return queryset.values(*paths)
+
+
+def serialize(rows, available, names):
+    columns = [(name, available[name], CONVERTERS.get(name))
+               for name in names]
+    return [
+        {name: convert(row[path]) if convert else row[path]
+         for name, path, convert in columns}
+        for row in rows
+    ]
+
+
+def json_response(data):
+    return JsonResponse(data, encoder=DjangoJSONEncoder,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+class ApiMixin:
+    """Ошибки запроса отдаются в JSON: 400 для параметров, 404."""
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return error_response(str(error))
+        except Http404 as error:
+            return error_response(str(error), status=404)
+
+
+class CursorListMixin:
+    """
+    Список словарей с курсорной пагинацией: `?after=` / `?before=`.
+
+    Строки берутся из `get_queryset()` представления. COUNT(*)
+    не выполняется, ссылки на соседние страницы отдаются курсорами
+    в `next` и `previous`.
+    """
+
+    fields = None
+    default_fields = None
+    cursor_ordering = ('-pub_date', '-id')
+
+    def get(self, request, *args, **kwargs):
+        names = select_fields(request, self.fields, self.default_fields)
+        keys = [name.lstrip('-') for name in self.cursor_ordering]
+        paginator = CursorPaginator(
+            project(self.get_queryset(), self.fields, names, keys),
+            get_limit(request), self.cursor_ordering)
+        try:
+            page = paginator.page(after=request.GET.get('after'),
+                                  before=request.GET.get('before'))
+        except InvalidPage as error:
+            raise Http404(str(error))
+        return json_response({
+            'results': serialize(page.object_list, self.fields, names),
+            'next': self.page_url(request, 'after', page.next_cursor),
+            'previous': self.page_url(request, 'before',
+                                      page.previous_cursor),
+        })
+
+    def page_url(self, request, param, cursor):
+        if cursor is None:
+            return None
+        query = request.GET.copy()
+        query.pop('after', None)
+        query.pop('before', None)
+        query[param] = cursor
+        return request.build_absolute_uri(
+            f'{request.path}?{query.urlencode()}')
+
+
+class PostListApiView(ApiMixin, ConditionalGetMixin, CursorListMixin, View):
+    """Лента публикаций: `/api/posts/`."""
+
+    fields = POST_FIELDS
+    default_fields = POST_DEFAULT_FIELDS
+    freshness_scopes = (FEED_SCOPE,)
+    vary_on_user = False
+
+    def get_queryset(self):
+        return get_feed_queryset()
+
+
+class CategoryPostsApiView(PostListApiView):
+
+    def get_freshness_scopes(self):
+        return (GLOBAL_SCOPE, category_scope(self.kwargs['category_slug']),
+                LOCATIONS_SCOPE)
+
+    def get_queryset(self):
+        category = get_object_or_404(
+            Category, slug=self.kwargs['category_slug'], is_published=True)
+        return add_filter_post_list(category.posts.all())
+
+
+class ProfilePostsApiView(PostListApiView):
+    """
+    Публикации автора. Снятые с публикации и отложенные посты видит
+    только сам автор.
+    """
+
+    vary_on_user = True
+
+    def get_freshness_scopes(self):
+        return (GLOBAL_SCOPE, author_scope(self.kwargs['username']),
+                CATEGORIES_SCOPE, LOCATIONS_SCOPE)
+
+    def get_freshness_viewer(self):
+        """Скрытые посты, а с ними и их даты, видит только автор."""
+        return self.request.user.get_username() == self.kwargs['username']
+
+    def get_queryset(self):
+        author = get_object_or_404(User, username=self.kwargs['username'])
+        posts = author.posts.all()
+        if author != self.request.user:
+            posts = add_filter_post_list(posts)
+        return posts
+
+
+class PostApiView(ApiMixin, PostScopesMixin, ConditionalGetMixin, View):
+    """Одна публикация: `/api/posts/<id>/`."""
+
+    def get_freshness_dates(self, scopes, stamps):
+        return []
+
+    def get(self, request, post_id):
+        names = select_fields(request, POST_FIELDS, tuple(POST_FIELDS))
+        queryset = project(get_visible_post_queryset(request.user),
+                           POST_FIELDS, names, RELATED_KEYS)
+        row = queryset.filter(pk=post_id).first()
+        if row is None:
+            raise Http404('Публикация не найдена.')
+        self.set_related_scopes(*(row[key] for key in RELATED_KEYS))
+        return json_response(serialize([row], POST_FIELDS, names)[0])
+
+
+class CommentListApiView(ApiMixin, ConditionalGetMixin, CursorListMixin,
+                         View):
+    """Комментарии к публикации: `/api/posts/<id>/comments/`."""
+
+    fields = COMMENT_FIELDS
+    default_fields = COMMENT_DEFAULT_FIELDS
+    cursor_ordering = ('created_at', 'id')
+
+    def get_freshness_scopes(self):
+        return (GLOBAL_SCOPE, post_scope(self.kwargs['post_id']))
+
+    def get_freshness_dates(self, scopes, stamps):
+        return []
+
+    def get_queryset(self):
+        post_id = self.kwargs['post_id']
+        if not get_visible_post_queryset(self.request.user).filter(
+                pk=post_id).exists():
+            raise Http404('Публикация не найдена.')
+        return Comment.objects.filter(post_id=post_id)
@@ -0,0 +1,187 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import Post
+from .querysets import add_filter_post_list, filter_profile_post_list
+from .views import (
+    CategotyPostListView, PostDetailView, PostListView, ProfileListView,
+    get_comments_page
+)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor():
+    """Пул потоков для работы с базой из async-представлений."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BLOG_ASYNC_DB_WORKERS,
+                thread_name_prefix='blog-db')
+    return _executor
+
+
+def _call_with_connections(func, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_db(func, *args, **kwargs):
+    """
+    Выполняет синхронную работу с базой в пуле `get_db_executor()`.
+
+    Контекст запроса (Server-Timing, замер SQL) переносится в поток пула,
+    соединения потока закрываются по правилам CONN_MAX_AGE, как в конце
+    обычного запроса.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_db_executor(), context.run, _call_with_connections, func, args,
+        kwargs)
+
+
+class AsyncPageMixin:
+    """
+    Async-версия страницы поверх её синхронного представления.
+
+    Методы синхронного класса переиспользуются. Всё, что может обратиться
+    к базе, выполняется через `run_db`, включая рендеринг: шаблоны читают
+    ленивые объекты вроде `request.user`. Независимые выборки — методы
+    из `loaders` — идут одновременно через `asyncio.gather`.
+    """
+
+    # Имена синхронных методов, загружающих данные страницы.
+    loaders = ()
+
+    @classmethod
+    def as_async_view(cls, **initkwargs):
+        async def view(request, *args, **kwargs):
+            self = cls(**initkwargs)
+            self.setup(request, *args, **kwargs)
+            return await self.async_dispatch(request)
+
+        view.view_class = cls
+        view.view_initkwargs = initkwargs
+        view.__doc__ = cls.__doc__
+        view.__module__ = cls.__module__
+        view.__name__ = cls.__name__
+        return view
+
+    async def async_dispatch(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return self.http_method_not_allowed(request)
+        response = await run_db(self.check_not_modified, request)
+        if response is None:
+            await self.load()
+            response = await run_db(self.render_page)
+        return self.add_validators(response)
+
+    async def load(self):
+        await asyncio.gather(*(run_db(getattr(self, name))
+                               for name in self.loaders))
+
+    def render_page(self):
+        return self.render_to_response(self.get_context_data()).render()
+
+
+class AsyncListMixin(AsyncPageMixin):
+    """
+    Лента: страница постов и связанный объект (категория, автор)
+    читаются одновременно.
+    """
+
+    loaders = ('load_related', 'load_page')
+    page_result = None
+
+    def load_related(self):
+        """Объекты страницы, не зависящие от выборки постов."""
+
+    def load_page(self):
+        self.object_list = self.get_queryset()
+        paginator, page, object_list, is_paginated = self.paginate_queryset(
+            self.object_list, self.get_paginate_by(self.object_list))
+        page.object_list = list(object_list)
+        self.page_result = (paginator, page, page.object_list, is_paginated)
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.page_result is not None:
+            return self.page_result
+        return super().paginate_queryset(queryset, page_size)
+
+    async def load(self):
+        if self.get_pagination_mode() == 'cursor':
+            return await super().load()
+        # Счётчик номерной навигации выбирается по связанному объекту.
+        for name in self.loaders:
+            await run_db(getattr(self, name))
+
+
+class AsyncPostListView(AsyncListMixin, PostListView):
+    pass
+
+
+class AsyncCategoryPostListView(AsyncListMixin, CategotyPostListView):
+
+    def get_queryset(self):
+        # Категория проверяется в load_related; фильтр по slug не ждёт её.
+        return add_filter_post_list(filter_profile_post_list(
+            Post.objects.filter(category__slug=self.kwargs['category_slug'])))
+
+    def load_related(self):
+        self.set_category(self.kwargs['category_slug'])
+
+
+class AsyncProfileListView(AsyncListMixin, ProfileListView):
+
+    def get_queryset(self):
+        return filter_profile_post_list(
+            Post.objects.filter(author__username=self.kwargs['username']))
+
+    def load_related(self):
+        self.set_author(self.kwargs['username'])
+
+
+class AsyncPostDetailView(AsyncPageMixin, PostDetailView):
+    """Пост и первая страница комментариев читаются одновременно."""
+
+    loaders = ('load_post', 'load_comments')
+    comments_page = None
+
+    def load_post(self):
+        self.object = self.get_object()
+
+    def load_comments(self):
+        # Видимость проверяет load_post: для скрытого поста ответ 404,
+        # и прочитанные комментарии не показываются.
+        self.comments_page = get_comments_page(
+            Post(pk=self.kwargs[self.pk_url_kwarg]))
+
+    def get_comments_page(self):
+        return self.comments_page
+
+
+ASYNC_PAGES = {
+    PostListView: AsyncPostListView,
+    CategotyPostListView: AsyncCategoryPostListView,
+    ProfileListView: AsyncProfileListView,
+    PostDetailView: AsyncPostDetailView,
+}
+
+
+def page_view(view_class):
+    """Представление страницы: async-версия при BLOG_ASYNC_VIEWS."""
+    if settings.BLOG_ASYNC_VIEWS:
+        return ASYNC_PAGES[view_class].as_async_view()
+    return view_class.as_view()
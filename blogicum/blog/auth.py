@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.utils.crypto import constant_time_compare
+
+from .caching import shared_cache
+
+
+User = get_user_model()
+
+# Поля пользователя в кэше: всё, кроме хэша пароля.
+CACHED_FIELDS = [field.attname for field in User._meta.concrete_fields
+                 if field.attname != 'password']
+
+
+def user_cache_key(pk):
+    return f'auth_user:{pk}'
+
+
+def forget_user(pk):
+    shared_cache.delete(user_cache_key(pk))
+
+
+def get_user(request):
+    """Пользователь запроса; загружается не больше раза за запрос."""
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = load_user(request)
+    return request._cached_user
+
+
+def load_user(request):
+    """
+    Пользователь сессии из кэша, а при промахе — как в `auth.get_user`.
+
+    Закэшированный пользователь проверяется так же, как загруженный
+    из базы: бэкенд должен быть в AUTHENTICATION_BACKENDS, а хэш сессии —
+    совпадать с хэшем от пароля, иначе смена пароля не завершала бы чужие
+    сессии. Сам хэш пароля в кэш не попадает: поле `password` остаётся
+    отложенным и читается из базы, только если оно понадобится, а `save()`
+    его не перезаписывает. Запись лежит в общем кэше, и её удаление
+    сигналами сохранения и удаления пользователя действует во всех
+    процессах сервера.
+    """
+    session = request.session
+    try:
+        pk = session[auth.SESSION_KEY]
+        backend = session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    key = user_cache_key(pk)
+    cached = shared_cache.get(key)
+    if cached is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            shared_cache.set(key, (
+                user._state.db,
+                [getattr(user, name) for name in CACHED_FIELDS],
+                user.get_session_auth_hash(),
+            ), settings.BLOG_USER_CACHE_TIMEOUT)
+        return user
+    db, values, user_hash = cached
+    session_hash = session.get(auth.HASH_SESSION_KEY)
+    if (backend not in settings.AUTHENTICATION_BACKENDS
+            or not session_hash
+            or not constant_time_compare(session_hash, user_hash)):
+        session.flush()
+        return AnonymousUser()
+    user = User.from_db(db, CACHED_FIELDS, values)
+    user.backend = backend
+    return user
@@ -0,0 +1,357 @@
+import asyncio
+import io
+import json
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from .constants import QUANTITY_ON_PAGINATE
+from .models import Category, Comment, Post
+from .querysets import get_feed_queryset
+from .seeding import seed_blog
+
+
+LOGIN_ROUTES = {
+    'blog:create_post', 'blog:edit_post', 'blog:delete_post',
+    'blog:edit_profile', 'blog:add_comment', 'blog:edit_comment',
+    'blog:delete_comment',
+}
+
+
+def _grow(posts, seed=0):
+    """
+    Догружает базу до `posts` публикаций через `seed_blog`.
+
+    Пропорции повторяют db.json: примерно 10 постов на автора, 6 категорий,
+    12 мест, около 3 комментариев на пост.
+    """
+    missing = posts - Post.objects.count()
+    if missing <= 0:
+        return
+    first = not Category.objects.exists()
+    seed_blog(
+        users=max(1, missing // 10),
+        categories=6 if first else 0,
+        locations=12 if first else 0,
+        posts=missing,
+        comments_per_post=3.0,
+        seed=seed + posts,
+    )
+
+
+def _iter_routes():
+    from blog import urls as blog_urls
+    from pages import urls as pages_urls
+    for module in (blog_urls, pages_urls):
+        for pattern in module.urlpatterns:
+            if isinstance(pattern, URLPattern):
+                yield f'{module.app_name}:{pattern.name}', pattern
+
+
+def _build_requests():
+    """Конкретные URL для каждого маршрута blog/ и pages/."""
+    post = (Post.objects
+            .filter(is_published=True, category__is_published=True,
+                    pub_date__lte=timezone.now(), comment_count__gt=0)
+            .select_related('author', 'category')
+            .order_by('-pub_date')
+            .first())
+    comment = Comment.objects.filter(post=post).first()
+    if comment.author_id != post.author_id:
+        Comment.objects.filter(pk=comment.pk).update(author=post.author)
+    values = {
+        'post_id': post.pk,
+        'comment_id': comment.pk,
+        'category_slug': post.category.slug,
+        'username': post.author.username,
+        'feed_format': 'rss',
+        'section': 'posts',
+        'shard': 0,
+    }
+    requests = {}
+    for name, pattern in _iter_routes():
+        kwargs = {key: values[key] for key in pattern.pattern.converters}
+        requests[name] = reverse(name, kwargs=kwargs)
+    last_page = max(1, get_feed_queryset().count() // QUANTITY_ON_PAGINATE)
+    requests['blog:index?page=last'] = (
+        reverse('blog:index') + f'?page={last_page}')
+    return requests, post.author
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def _measure(client, url, repeat, warm_cache):
+    latencies, sql_times = [], []
+    queries = size = status = 0
+    for _ in range(repeat):
+        if not warm_cache:
+            cache.clear()
+        timer = _QueryTimer()
+        with connection.execute_wrapper(timer):
+            started = time.perf_counter()
+            response = client.get(url)
+            # Тело потокового ответа формируется при чтении.
+            content = (b''.join(response.streaming_content)
+                       if response.streaming else response.content)
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries = timer.count
+        sql_times.append(timer.seconds * 1000)
+        size = len(content)
+        status = response.status_code
+    return {
+        'url': url,
+        'status': status,
+        'p50_ms': round(_percentile(latencies, 50), 3),
+        'p95_ms': round(_percentile(latencies, 95), 3),
+        'queries': queries,
+        'sql_ms': round(statistics.median(sql_times), 3),
+        'response_bytes': size,
+    }
+
+
+def run_benchmark(sizes, repeat=20, warm_cache=False, seed=0):
+    """
+    Прогоняет все маршруты на базе каждого размера из `sizes`.
+
+    Размеры обходятся по возрастанию: база догружается до следующего
+    размера, а не создаётся заново.
+    """
+    results = {}
+    for posts in sorted(sizes):
+        _grow(posts, seed=seed)
+        requests, author = _build_requests()
+        anonymous, logged_in = Client(), Client()
+        logged_in.force_login(author)
+        results[str(posts)] = {
+            name: _measure(
+                logged_in if name in LOGIN_ROUTES else anonymous,
+                url, repeat, warm_cache)
+            for name, url in requests.items()
+        }
+    return {
+        'meta': {
+            'sizes': sorted(sizes),
+            'repeat': repeat,
+            'warm_cache': warm_cache,
+            'created_at': timezone.now().isoformat(),
+            'vendor': connection.vendor,
+        },
+        'results': results,
+    }
+
+
+def check_budgets(report, budgets=None):
+    """
+    Список нарушений бюджета в виде строк.
+
+    Бюджет маршрута ищется по имени, затем по ключу `*`; метрика,
+    отсутствующая в бюджете, не проверяется.
+    """
+    budgets = settings.BLOG_BENCHMARK_BUDGETS if budgets is None else budgets
+    violations = []
+    for size, routes in report['results'].items():
+        for name, metrics in routes.items():
+            budget = budgets.get(name, budgets.get('*', {}))
+            for metric, limit in budget.items():
+                if metrics[metric] > limit:
+                    violations.append(
+                        f'{size} постов, {name}: {metric}='
+                        f'{metrics[metric]} > {limit}')
+    return violations
+
+
+def dump_report(report, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def page_urls():
+    """Лента, категория, профиль и пост по последней видимой публикации."""
+    post = get_feed_queryset().first()
+    if post is None:
+        return []
+    return [
+        reverse('blog:index'),
+        reverse('blog:category_posts', args=[post.category.slug]),
+        reverse('blog:profile', args=[post.author.username]),
+        reverse('blog:post_detail', args=[post.pk]),
+    ]
+
+
+def _wsgi_request(application, url):
+    path, _, query = url.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    statuses = []
+    result = application(
+        environ, lambda status, headers, exc_info=None: statuses.append(
+            status))
+    try:
+        b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return int(statuses[0].split()[0])
+
+
+async def _asgi_request(application, url):
+    path, _, query = url.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 0),
+    }
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    statuses = []
+
+    async def receive():
+        return messages.pop() if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    await application(scope, receive, send)
+    return statuses[0]
+
+
+def _run_wsgi(urls, concurrency, latencies):
+    from blogicum.wsgi import application
+
+    def request(url):
+        started = time.perf_counter()
+        status = _wsgi_request(application, url)
+        latencies.append((time.perf_counter() - started) * 1000)
+        return status
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(request, urls))
+
+
+def _run_asgi(urls, concurrency, latencies):
+    from blogicum.asgi import application
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request(url):
+            async with semaphore:
+                started = time.perf_counter()
+                status = await _asgi_request(application, url)
+                latencies.append((time.perf_counter() - started) * 1000)
+                return status
+
+        return await asyncio.gather(*(request(url) for url in urls))
+
+    return asyncio.run(run())
+
+
+DEPLOYMENTS = {
+    'wsgi': _run_wsgi,
+    'asgi': _run_asgi,
+}
+
+
+def run_load(mode, urls, requests=200, concurrency=8, cache_pages=False):
+    """
+    Пропускная способность приложения blogicum.wsgi или blogicum.asgi.
+
+    `requests` запросов по кругу `urls` выполняются в этом процессе
+    с `concurrency` одновременными клиентами: потоками для WSGI,
+    задачами цикла событий для ASGI. Без `cache_pages` каждый URL
+    получает уникальный параметр, и кэш анонимных страниц не срабатывает.
+    """
+    targets = [urls[index % len(urls)] for index in range(requests)]
+    if not cache_pages:
+        targets = [f'{url}?bench={index}'
+                   for index, url in enumerate(targets)]
+    latencies = []
+    started = time.perf_counter()
+    statuses = DEPLOYMENTS[mode](targets, concurrency, latencies)
+    elapsed = time.perf_counter() - started
+    return {
+        'mode': mode,
+        'requests': requests,
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 3),
+        'rps': round(requests / elapsed, 1),
+        'p50_ms': round(_percentile(latencies, 50), 3),
+        'p95_ms': round(_percentile(latencies, 95), 3),
+        'statuses': dict(Counter(map(str, statuses))),
+    }
+
+
+def run_first_requests(urls):
+    """
+    Время запуска blogicum.wsgi и первого и повторного запроса к `urls`.
+
+    Повторный запрос идёт с параметром мимо кэша анонимных страниц. Замер
+    имеет смысл только в свежем процессе, где шаблоны ещё не
+    скомпилированы: прогрев BLOG_TEMPLATE_WARMUP входит во время запуска.
+    """
+    started = time.perf_counter()
+    from blogicum.wsgi import application
+    startup = (time.perf_counter() - started) * 1000
+    timings, statuses = {'first': {}, 'repeat': {}}, []
+    for attempt, query in (('first', ''), ('repeat', '?repeat=1')):
+        for url in urls:
+            started = time.perf_counter()
+            statuses.append(_wsgi_request(application, url + query))
+            timings[attempt][url] = round(
+                (time.perf_counter() - started) * 1000, 3)
+    return {
+        'warmup': settings.BLOG_TEMPLATE_WARMUP,
+        'startup_ms': round(startup, 3),
+        'first_ms': timings['first'],
+        'repeat_ms': timings['repeat'],
+        'statuses': dict(Counter(map(str, statuses))),
+    }
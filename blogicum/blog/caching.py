@@ -0,0 +1,96 @@
+import time
+from hashlib import md5
+
+from django.core.cache import cache, caches
+from django.utils.connection import ConnectionProxy
+
+from .constants import SITEMAP_SHARD_SIZE
+
+
+# Кэш, общий для всех процессов сервера (см. CACHES в настройках).
+shared_cache = ConnectionProxy(caches, 'shared')
+
+# Область всех страниц: её сброс обновляет весь кэш разом.
+GLOBAL_SCOPE = 'global'
+FEED_SCOPE = 'feed'
+# Видимость постов во всех файлах sitemap (публикация категорий).
+SITEMAP_VISIBILITY_SCOPE = 'sitemap:visibility'
+# Названия и статусы категорий и мест в карточках страниц, где собраны
+# посты разных категорий (страницы авторов) и мест (авторов и категорий).
+CATEGORIES_SCOPE = 'categories'
+LOCATIONS_SCOPE = 'locations'
+
+
+def category_scope(slug):
+    return f'category:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def post_scope(pk):
+    return f'post:{pk}'
+
+
+def location_scope(pk):
+    return f'location:{pk}'
+
+
+def sitemap_shard(pk):
+    """Номер файла sitemap: файл k содержит id из (k * N, (k + 1) * N]."""
+    return (pk - 1) // SITEMAP_SHARD_SIZE
+
+
+def sitemap_scope(section, pk):
+    """Область файла sitemap, в диапазон id которого попадает `pk`."""
+    return f'sitemap:{section}:{sitemap_shard(pk)}'
+
+
+def _stamp_key(scope):
+    return f'scope_stamp:{scope}'
+
+
+def get_scope_stamps(*scopes):
+    """
+    Отметки времени последнего изменения областей кэша.
+
+    Отметка входит в ключ закэшированной страницы, поэтому «сбросить»
+    область — значит просто записать новую отметку. Отметки лежат в общем
+    кэше, и новую отметку видят все процессы сервера.
+    """
+    keys = [_stamp_key(scope) for scope in scopes]
+    stamps = shared_cache.get_many(keys)
+    for key in keys:
+        if key not in stamps:
+            now = time.time()
+            if not shared_cache.add(key, now, timeout=None):
+                now = shared_cache.get(key, now)
+            stamps[key] = now
+    return [stamps[key] for key in keys]
+
+
+def touch_scopes(*scopes):
+    now = time.time()
+    shared_cache.set_many(
+        {_stamp_key(scope): now for scope in scopes if scope},
+        timeout=None,
+    )
+
+
+def digest(*parts):
+    return md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def make_etag(*parts):
+    """Строгий ETag из значений, от которых зависит содержимое страницы."""
+    return f'"{digest(*parts)}"'
+
+
+def cache_chunks(chunks, key, timeout):
+    """Отдаёт части потокового ответа и кэширует документ целиком."""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, ''.join(parts), timeout)
@@ -0,0 +1,53 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+
+CARD_TEMPLATE = 'includes/post_card.html'
+
+
+def get_card_version(post):
+    """
+    Версия карточки: хеш всех полей, которые попадают в её разметку.
+
+    Меняется при правке поста, его категории, местоположения, имени автора
+    и числа комментариев, поэтому явная инвалидация не нужна.
+    """
+    category = post.category
+    location = post.location
+    parts = (
+        post.title, post.text, post.pub_date.isoformat(), post.is_published,
+        post.image.name, post.comment_count, post.author.username,
+        category and (category.slug, category.title, category.is_published),
+        location and (location.name, location.is_published),
+    )
+    return md5(repr(parts).encode()).hexdigest()
+
+
+def get_card_cache_key(post):
+    return f'post_card:{post.pk}:{get_card_version(post)}'
+
+
+def attach_card_html(posts):
+    """
+    Добавляет каждому посту атрибут `card_html` с готовой карточкой.
+
+    Все карточки страницы читаются из кэша одним `get_many`, рендерятся
+    только промахи.
+    """
+    posts = list(posts)
+    keys = {post.pk: get_card_cache_key(post) for post in posts}
+    cached = cache.get_many(keys.values())
+    rendered = {}
+    for post in posts:
+        html = cached.get(keys[post.pk])
+        if html is None:
+            html = render_to_string(CARD_TEMPLATE, {'post': post})
+            rendered[keys[post.pk]] = html
+        post.card_html = mark_safe(html)
+    if rendered:
+        cache.set_many(rendered, settings.BLOG_CARD_CACHE_TIMEOUT)
+    return posts
@@ -1,2 +1,14 @@
 LENGTH_CHAR = 256
 QUANTITY_ON_PAGINATE = 10
+COMMENTS_ON_PAGE = 10
+# Варианты изображений постов: имя -> (ширина в пикселях, качество JPEG).
+IMAGE_VARIANTS = {
+    'card': (640, 82),
+    'detail': (1280, 85),
+    'placeholder': (24, 40),
+}
+FEED_ITEMS = 20
+# Наибольший размер страницы JSON API (`?limit=`).
+API_MAX_LIMIT = 100
+# Наибольшее число URL в одном файле sitemap (ограничение протокола).
+SITEMAP_SHARD_SIZE = 50000
@@ -0,0 +1,120 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Post, PostCounter
+
+
+FEED_COUNTER = 'feed'
+
+
+def category_counter(pk):
+    return f'category:{pk}'
+
+
+def author_counter(pk):
+    return f'author:{pk}'
+
+
+def post_counters(is_published, category_id, category_published, author_id):
+    """
+    Счётчики, в которые входит пост в данном состоянии.
+
+    Дата публикации не учитывается: отложенные посты пагинатор вычитает
+    отдельным запросом. Профиль показывает все посты автора, поэтому
+    счётчик автора считает их все.
+    """
+    counters = [author_counter(author_id)]
+    if is_published and category_id:
+        counters.append(category_counter(category_id))
+        if category_published:
+            counters.append(FEED_COUNTER)
+    return counters
+
+
+def count_actual(scope):
+    """Значение счётчика по текущим данным, одним COUNT(*)."""
+    kind, _, pk = scope.partition(':')
+    if kind == 'category':
+        queryset = Post.objects.filter(is_published=True, category_id=pk)
+    elif kind == 'author':
+        queryset = Post.objects.filter(author_id=pk)
+    else:
+        queryset = Post.objects.filter(is_published=True,
+                                       category__is_published=True)
+    return queryset.count()
+
+
+def get_count(scope):
+    """Значение счётчика; недостающая строка создаётся пересчётом."""
+    value = (PostCounter.objects
+             .filter(scope=scope)
+             .values_list('value', flat=True)
+             .first())
+    if value is None:
+        value = PostCounter.objects.get_or_create(
+            scope=scope, defaults={'value': count_actual(scope)})[0].value
+    return value
+
+
+def adjust_counters(deltas):
+    """
+    Применяет {счётчик: приращение} в одной транзакции.
+
+    Существующие строки меняются через F(), без чтения; для отсутствующей
+    строки значение считается заново, уже с учётом изменения.
+    """
+    with transaction.atomic():
+        for scope, delta in deltas.items():
+            if not delta:
+                continue
+            updated = PostCounter.objects.filter(scope=scope).update(
+                value=F('value') + delta)
+            if not updated:
+                PostCounter.objects.get_or_create(
+                    scope=scope, defaults={'value': count_actual(scope)})
+
+
+def post_counter_deltas(previous, current):
+    deltas = Counter(current)
+    deltas.subtract(previous)
+    return deltas
+
+
+def _actual_counts():
+    counts = {FEED_COUNTER: count_actual(FEED_COUNTER)}
+    by_category = (Post.objects
+                   .filter(is_published=True, category__isnull=False)
+                   .order_by()
+                   .values_list('category')
+                   .annotate(total=Count('id')))
+    counts.update((category_counter(pk), total) for pk, total in by_category)
+    by_author = (Post.objects
+                 .order_by()
+                 .values_list('author')
+                 .annotate(total=Count('id')))
+    counts.update((author_counter(pk), total) for pk, total in by_author)
+    return counts
+
+
+def recount_post_counters():
+    """
+    Пересчитывает все счётчики тремя запросами с GROUP BY.
+
+    Возвращает (проверено, исправлено). Строки счётчиков, для которых
+    постов не осталось, удаляются.
+    """
+    actual = _actual_counts()
+    stored = dict(PostCounter.objects.values_list('scope', 'value'))
+    fixed = 0
+    with transaction.atomic():
+        for scope, value in actual.items():
+            if stored.get(scope) != value:
+                PostCounter.objects.update_or_create(
+                    scope=scope, defaults={'value': value})
+                fixed += 1
+        stale = [scope for scope in stored if scope not in actual]
+        fixed += sum(1 for scope in stale if stored[scope])
+        PostCounter.objects.filter(scope__in=stale).delete()
+    return len(actual.keys() | stored.keys()), fixed
@@ -0,0 +1,97 @@
+import logging
+import random
+import re
+import time
+from functools import partial, wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .routers import mark_replica_synced
+
+
+PRAGMA_NAME = re.compile(r'\w+')
+PRAGMA_VALUE = re.compile(r'-?\w+')
+LOCKED_MESSAGES = ('database is locked', 'database table is locked')
+
+logger = logging.getLogger('blog.db')
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Настраивает каждое новое соединение SQLite по BLOG_SQLITE_PRAGMAS.
+
+    `busy_timeout` идёт первым: переключение журнала тоже ждёт
+    блокировку, а не падает сразу.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = settings.BLOG_SQLITE_PRAGMAS
+    names = sorted(pragmas, key=lambda name: name != 'busy_timeout')
+    with connection.cursor() as cursor:
+        for name in names:
+            value = str(pragmas[name])
+            if not (PRAGMA_NAME.fullmatch(name)
+                    and PRAGMA_VALUE.fullmatch(value)):
+                raise ValueError(f'Некорректная настройка PRAGMA {name}.')
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def sync_replica(alias, source=DEFAULT_DB_ALIAS, pages=4096):
+    """
+    Копирует базу `source` в файл реплики `alias` через backup API SQLite.
+
+    Копирование идёт порциями по `pages` страниц, и между порциями
+    основная база доступна для записи. Реплика отмечается скопированной
+    на момент начала копирования. Возвращает число страниц копии.
+    """
+    primary, replica = connections[source], connections[alias]
+    if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+        raise ValueError('Реплики через backup API есть только у SQLite.')
+    primary.ensure_connection()
+    replica.ensure_connection()
+    copied = []
+    started = time.time()
+    primary.connection.backup(
+        replica.connection, pages=pages,
+        progress=lambda status, remaining, total: copied.append(total))
+    mark_replica_synced(alias, started)
+    return copied[-1] if copied else 0
+
+
+def is_locked_error(error):
+    message = str(error).lower()
+    return any(text in message for text in LOCKED_MESSAGES)
+
+
+def retry_on_locked(func=None, *, using=DEFAULT_DB_ALIAS):
+    """
+    Повторяет запись, на которую SQLite ответил `database is locked`.
+
+    Паузы растут вдвое от BLOG_DB_RETRY_DELAY со случайным разбросом,
+    попыток не больше BLOG_DB_RETRY_ATTEMPTS. Внутри внешней транзакции
+    ошибка пробрасывается сразу: откатить и повторить её может только
+    внешний код. Обёрнутая функция должна сама открывать транзакцию.
+    """
+    if func is None:
+        return partial(retry_on_locked, using=using)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        attempts = settings.BLOG_DB_RETRY_ATTEMPTS
+        for attempt in range(1, attempts + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as error:
+                if (attempt == attempts or not is_locked_error(error)
+                        or connections[using].in_atomic_block):
+                    raise
+                delay = settings.BLOG_DB_RETRY_DELAY * 2 ** (attempt - 1)
+                logger.warning('%s: база занята, попытка %s из %s',
+                               func.__qualname__, attempt, attempts)
+                time.sleep(delay * random.uniform(0.5, 1.5))
+
+    return wrapper
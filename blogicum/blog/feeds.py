@@ -0,0 +1,177 @@
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.xmlutils import SimplerXMLGenerator
+from django.views import View
+
+from .caching import (
+    CATEGORIES_SCOPE, FEED_SCOPE, GLOBAL_SCOPE, author_scope, cache_chunks,
+    category_scope, digest
+)
+from .constants import FEED_ITEMS
+from .models import Category, Post
+from .querysets import add_filter_post_list, filter_profile_post_list
+from .routers import read_stale_replica
+from .views import ConditionalGetMixin
+
+
+User = get_user_model()
+
+
+class StreamingFeedMixin:
+    """
+    Документ фида по частям: шапка, элементы по одному, хвост.
+
+    Шапка и хвост получаются обычным `write()`, в котором на месте
+    элементов стоит маркер; каждый элемент пишется `write_items()`
+    самого класса фида, поэтому разметка совпадает с Django.
+    """
+
+    # Символ из области частного использования не встречается в тексте.
+    marker = '\ue000'
+
+    def write_items(self, handler):
+        if self.items:
+            return super().write_items(handler)
+        handler.ignorableWhitespace(self.marker)
+
+    def latest_post_date(self):
+        return self.feed.get('updated') or super().latest_post_date()
+
+    def iter_chunks(self, items, encoding='utf-8'):
+        document = StringIO()
+        self.items = []
+        self.write(document, encoding)
+        head, tail = document.getvalue().split(self.marker)
+        yield head
+        for item in items:
+            self.items = []
+            self.add_item(**item)
+            chunk = StringIO()
+            super().write_items(SimplerXMLGenerator(
+                chunk, encoding, short_empty_elements=True))
+            yield chunk.getvalue()
+        yield tail
+
+
+class StreamingRssFeed(StreamingFeedMixin, Rss201rev2Feed):
+    pass
+
+
+class StreamingAtomFeed(StreamingFeedMixin, Atom1Feed):
+    pass
+
+
+FEED_TYPES = {
+    'rss': StreamingRssFeed,
+    'atom': StreamingAtomFeed,
+}
+
+
+class PostFeedView(ConditionalGetMixin, View):
+    """
+    RSS или Atom последних публикаций ленты.
+
+    Документ отдаётся потоком и кэшируется целиком под ключом из ETag
+    страницы, который меняется вместе с отметками областей кэша, так что
+    кэш действует, пока в области фида не изменится пост.
+    """
+
+    freshness_scopes = (FEED_SCOPE,)
+    vary_on_user = False
+    title = 'Блогикум'
+    description = 'Новые публикации'
+
+    def get_queryset(self):
+        return add_filter_post_list(filter_profile_post_list(
+            self.get_posts()))
+
+    def get_posts(self):
+        return Post.objects
+
+    def get_link(self):
+        return reverse('blog:index')
+
+    def get_feed(self, feed_class):
+        request = self.request
+        return feed_class(
+            title=self.title,
+            link=request.build_absolute_uri(self.get_link()),
+            description=self.description,
+            feed_url=request.build_absolute_uri(),
+            language='ru',
+            updated=self.newest,
+        )
+
+    def get_item(self, post):
+        link = self.request.build_absolute_uri(
+            reverse('blog:post_detail', args=[post.pk]))
+        return {
+            'title': post.title,
+            'link': link,
+            'description': post.text,
+            'unique_id': link,
+            'author_name': post.author.username,
+            'pubdate': post.pub_date,
+            'categories': [post.category.title] if post.category else (),
+        }
+
+    def get_freshness_dates(self, scopes, stamps):
+        dates = super().get_freshness_dates(scopes, stamps)
+        self.newest = dates[0]
+        return dates
+
+    def get(self, request, *args, feed_format, **kwargs):
+        feed_class = FEED_TYPES.get(feed_format)
+        if feed_class is None:
+            raise Http404('Неизвестный формат фида.')
+        content_type = feed_class.content_type
+        key = 'feed:' + digest(request.get_host(), self.etag)
+        document = cache.get(key)
+        if document is not None:
+            return HttpResponse(document, content_type=content_type)
+        posts = self.get_queryset()[:FEED_ITEMS]
+        chunks = self.get_feed(feed_class).iter_chunks(
+            self.get_item(post) for post in posts)
+        if not read_stale_replica(self.changed_at):
+            chunks = cache_chunks(chunks, key,
+                                  settings.BLOG_FEED_CACHE_TIMEOUT)
+        return StreamingHttpResponse(chunks, content_type=content_type)
+
+
+class CategoryFeedView(PostFeedView):
+
+    def get_freshness_scopes(self):
+        return (GLOBAL_SCOPE, category_scope(self.kwargs['category_slug']))
+
+    def get_posts(self):
+        self.category = get_object_or_404(
+            Category, slug=self.kwargs['category_slug'], is_published=True)
+        self.title = f'Блогикум: {self.category.title}'
+        return self.category.posts
+
+    def get_link(self):
+        return reverse('blog:category_posts',
+                       args=[self.kwargs['category_slug']])
+
+
+class AuthorFeedView(PostFeedView):
+
+    def get_freshness_scopes(self):
+        return (GLOBAL_SCOPE, author_scope(self.kwargs['username']),
+                CATEGORIES_SCOPE)
+
+    def get_posts(self):
+        self.author = get_object_or_404(User,
+                                        username=self.kwargs['username'])
+        self.title = f'Блогикум: @{self.author.username}'
+        return self.author.posts
+
+    def get_link(self):
+        return reverse('blog:profile', args=[self.kwargs['username']])
@@ -0,0 +1,72 @@
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .constants import IMAGE_VARIANTS
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_variant_name(name, variant):
+    """
+    `posts_images/photo.png` -> `posts_images/variants/photo.png/card.jpg`.
+
+    Загрузки сохраняются прямо в `posts_images/`, поэтому в `variants/`
+    лежат только файлы, созданные здесь, и удалять их безопасно.
+    """
+    directory, filename = posixpath.split(name)
+    return posixpath.join(directory, 'variants', filename, f'{variant}.jpg')
+
+
+def _resize(source, width, quality):
+    image = ImageOps.exif_transpose(source)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    if image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def generate_variants(image, variants=None):
+    """Сохраняет уменьшенные копии изображения в каталог его вариантов."""
+    storage = image.storage
+    with storage.open(image.name, 'rb') as file:
+        with Image.open(file) as source:
+            source.load()
+    for variant in variants or IMAGE_VARIANTS:
+        width, quality = IMAGE_VARIANTS[variant]
+        name = get_variant_name(image.name, variant)
+        if storage.exists(name):
+            storage.delete(name)
+        storage.save(name, ContentFile(_resize(source, width, quality)))
+
+
+def delete_variants(name, storage):
+    for variant in IMAGE_VARIANTS:
+        variant_name = get_variant_name(name, variant)
+        if storage.exists(variant_name):
+            storage.delete(variant_name)
+
+
+def get_variant_url(image, variant):
+    """
+    URL уменьшенной копии; недостающая копия создаётся при первом запросе.
+
+    Если исходный файл не читается, возвращается URL оригинала.
+    """
+    name = get_variant_name(image.name, variant)
+    if not image.storage.exists(name):
+        try:
+            generate_variants(image, [variant])
+        except (OSError, ValueError):
+            logger.exception('Не удалось создать вариант %s для %s',
+                             variant, image.name)
+            return image.url
+    return image.storage.url(name)
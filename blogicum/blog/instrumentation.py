@@ -0,0 +1,234 @@
+import re
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from hashlib import md5
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.base import Template
+from django.template.loader_tags import ExtendsNode
+
+
+FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+# Последние замеры процесса; читаются отладочным представлением query_log.
+RECENT = deque(maxlen=settings.BLOG_SQL_LOG_SIZE)
+
+_query_wrappers = ContextVar('blog_query_wrappers', default=())
+
+
+def fingerprint(sql):
+    """
+    Нормализованный текст запроса: литералы и параметры заменены на `?`,
+    списки `IN (?, ?, ...)` любой длины сведены к `(...)`.
+    """
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint_id(text):
+    return md5(text.encode()).hexdigest()[:12]
+
+
+class QueryCollector:
+    """
+    Обёртка `connection.execute_wrapper`, считающая запросы запроса.
+
+    Отпечатки запросов вычисляются на лету, сам SQL и параметры
+    не сохраняются.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+        self.fingerprint_seconds = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            key = fingerprint(sql)
+            self.count += 1
+            self.seconds += elapsed
+            self.fingerprints[key] += 1
+            self.fingerprint_seconds[key] += elapsed
+
+    def repeated(self, threshold):
+        """Отпечатки, повторившиеся больше `threshold` раз: вероятный N+1."""
+        return [(key, count) for key, count in self.fingerprints.items()
+                if count > threshold]
+
+    def summary(self, top=5):
+        return {
+            'queries': self.count,
+            'sql_ms': round(self.seconds * 1000, 3),
+            'top': [
+                {
+                    'fingerprint': key,
+                    'id': fingerprint_id(key),
+                    'count': count,
+                    'sql_ms': round(self.fingerprint_seconds[key] * 1000, 3),
+                }
+                for key, count in self.fingerprints.most_common(top)
+            ],
+        }
+
+
+_server_timings = ContextVar('blog_server_timings', default=None)
+
+
+class ServerTimings:
+    """
+    Разбивка времени запроса на фазы для заголовка Server-Timing.
+
+    Время SQL считается обёрткой `execute_wrapper`, время шаблонов —
+    обёрткой `Template._render` (см. `install_template_timing`). Фазы
+    не пересекаются: SQL, выполненный при рендеринге, входит в `db`,
+    а не в `tpl`.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db = self.handler_db = self.template_db = 0.0
+        self.template = 0.0
+        self.extending = []
+        self.in_handler = False
+        self.handler_started = None
+        self.renders = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db += elapsed
+            if self.in_handler:
+                self.handler_db += elapsed
+            if self.extending:
+                self.template_db += elapsed
+
+    def render(self, render, template, context):
+        # Рендер родителя из {% extends %} — часть той же страницы,
+        # а не вложенный шаблон.
+        layout = bool(self.extending) and self.extending[-1]
+        self.extending.append(any(
+            isinstance(node, ExtendsNode) for node in template.nodelist))
+        started = time.perf_counter()
+        try:
+            return render(template, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.extending.pop()
+            if not self.extending:
+                self.template += elapsed
+            if not layout:
+                self.renders.append(
+                    (elapsed, bool(self.extending), template.name))
+
+    def slowest_include(self):
+        """Самый долгий шаблон, кроме самой страницы."""
+        top = [render for render in self.renders if not render[1]]
+        page = max(top, default=None)
+        candidates = [render for render in self.renders if render is not page]
+        return max(candidates, default=None)
+
+    def header(self, total, handler):
+        view = handler - self.template - (self.handler_db - self.template_db)
+        phases = [
+            ('db', self.db, f'{self.queries} SQL'),
+            ('view', view, None),
+            ('tpl', self.template - self.template_db, None),
+            ('mw', total - handler - (self.db - self.handler_db), None),
+            ('total', total, None),
+        ]
+        include = self.slowest_include()
+        if include:
+            phases.append(('inc', include[0], include[2] or 'template'))
+        return ', '.join(
+            f'{name};dur={max(seconds, 0) * 1000:.1f}'
+            + (f';desc="{desc}"' if desc else '')
+            for name, seconds, desc in phases
+        )
+
+
+def get_server_timings():
+    return _server_timings.get()
+
+
+def start_server_timings():
+    timings = ServerTimings()
+    return timings, _server_timings.set(timings)
+
+
+def stop_server_timings(token):
+    _server_timings.reset(token)
+
+
+def _dispatch_query(execute, sql, params, many, context):
+    for wrapper in reversed(_query_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_dispatch(sender=None, connection=None, **kwargs):
+    """
+    Постоянная обёртка соединения, вызывающая обёртки текущего запроса.
+
+    Ставится при подключении в любом потоке, поэтому SQL, выполненный
+    в потоке `sync_to_async` или в пуле `blog.async_views`, замеряется
+    так же, как в потоке запроса.
+    """
+    targets = [connection] if connection else connections.all()
+    for target in targets:
+        if _dispatch_query not in target.execute_wrappers:
+            target.execute_wrappers.insert(0, _dispatch_query)
+
+
+@contextmanager
+def instrument_queries(wrapper):
+    """
+    Подключает обёртку `execute_wrapper` ко всему SQL HTTP-запроса.
+
+    Обёртка хранится в контексте запроса, а не в соединении, которое
+    под ASGI делят одновременные запросы.
+    """
+    install_query_dispatch()
+    token = _query_wrappers.set((*_query_wrappers.get(), wrapper))
+    try:
+        yield
+    finally:
+        _query_wrappers.reset(token)
+
+
+def install_template_timing():
+    """Оборачивает `Template._render` один раз на процесс."""
+    original = Template._render
+    if getattr(original, 'server_timing', False):
+        return
+
+    def _render(self, context):
+        timings = _server_timings.get()
+        if timings is None:
+            return original(self, context)
+        return timings.render(original, self, context)
+
+    _render.server_timing = True
+    Template._render = _render
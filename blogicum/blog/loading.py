@@ -0,0 +1,118 @@
+import json
+import time
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.core.serializers.python import Deserializer
+from django.db import connection, transaction
+
+from .caching import GLOBAL_SCOPE, touch_scopes
+
+
+CHUNK_SIZE = 1 << 16
+
+# Порядок загрузки: модели уровня могут ссылаться только на предыдущие.
+LOAD_ORDER = (
+    ('auth.user',),
+    ('blog.category', 'blog.location'),
+    ('blog.post',),
+    ('blog.comment',),
+)
+
+
+def _chunks(file, chunk_size):
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_json_array(file, chunk_size=CHUNK_SIZE):
+    """
+    Объекты JSON-массива верхнего уровня по одному.
+
+    Файл читается кусками, в памяти держится только текущий кусок
+    и разбираемый объект.
+    """
+    decoder = json.JSONDecoder()
+    chunks = _chunks(file, chunk_size)
+    buffer = ''
+    for chunk in chunks:
+        buffer = (buffer + chunk).lstrip()
+        if buffer:
+            break
+    if not buffer.startswith('['):
+        raise ValueError('Ожидался JSON-массив объектов.')
+    position = 1
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if buffer.startswith(']', position):
+            return
+        try:
+            obj, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield obj
+
+
+def _flush(model, batch, ignore_conflicts):
+    with transaction.atomic():
+        model.objects.bulk_create([item.object for item in batch],
+                                  ignore_conflicts=ignore_conflicts)
+        for item in batch:
+            for name, values in (item.m2m_data or {}).items():
+                if values:
+                    getattr(item.object, name).set(values)
+
+
+def load_fixture(path, batch_size=2000, ignore_conflicts=False,
+                 report=None):
+    """
+    Загружает дамп формата db.json пакетами `bulk_create`.
+
+    Файл проходится один раз на каждый уровень LOAD_ORDER, так что
+    родительские строки всегда вставлены раньше дочерних; модели вне
+    LOAD_ORDER пропускаются (их загружает обычный loaddata). Проверка
+    внешних ключей отключается на время вставки и выполняется в конце.
+    Возвращает {метка модели: число строк}.
+    """
+    loaded = {}
+    with connection.constraint_checks_disabled():
+        for labels in LOAD_ORDER:
+            started = time.perf_counter()
+            batches = {label: [] for label in labels}
+            with open(path, encoding='utf-8') as file:
+                for obj in iter_json_array(file):
+                    label = obj.get('model', '').lower()
+                    if label not in batches:
+                        continue
+                    batch = batches[label]
+                    batch.extend(Deserializer([obj], ignorenonexistent=True))
+                    if len(batch) >= batch_size:
+                        _flush(apps.get_model(label), batch,
+                               ignore_conflicts)
+                        loaded[label] = loaded.get(label, 0) + len(batch)
+                        batch.clear()
+            for label, batch in batches.items():
+                if batch:
+                    _flush(apps.get_model(label), batch, ignore_conflicts)
+                    loaded[label] = loaded.get(label, 0) + len(batch)
+            if report:
+                elapsed = time.perf_counter() - started
+                for label in labels:
+                    report(label, loaded.get(label, 0), elapsed)
+    models = [apps.get_model(label) for labels in LOAD_ORDER
+              for label in labels]
+    connection.check_constraints(
+        table_names=[model._meta.db_table for model in models])
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+    touch_scopes(GLOBAL_SCOPE)
+    return loaded
@@ -0,0 +1,72 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmark import DEPLOYMENTS, page_urls, run_load
+
+# Режим развёртывания -> значение BLOG_ASYNC_VIEWS, с которым он работает.
+ASYNC_VIEWS = {
+    'wsgi': '0',
+    'asgi': '1',
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность WSGI с обычными '
+            'представлениями и ASGI с async-представлениями на страницах '
+            'ленты, категории, профиля и поста текущей базы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--cache-pages', action='store_true',
+                            help='Не обходить кэш анонимных страниц.')
+        parser.add_argument('--output', default='deployments.json')
+        parser.add_argument('--mode', choices=sorted(DEPLOYMENTS),
+                            help='Замерить один режим в этом процессе и '
+                                 'вывести JSON.')
+
+    def handle(self, *args, **options):
+        urls = page_urls()
+        if not urls:
+            raise CommandError('В базе нет видимых публикаций: заполните '
+                               'её командой seed_blog.')
+        if options['mode']:
+            result = run_load(
+                options['mode'], urls, requests=options['requests'],
+                concurrency=options['concurrency'],
+                cache_pages=options['cache_pages'])
+            self.stdout.write(json.dumps(result))
+            return
+        # Выбор представлений читается из окружения при загрузке настроек,
+        # поэтому каждый режим замеряется в своём процессе.
+        results = {mode: self.measure(mode, options) for mode in ASYNC_VIEWS}
+        for result in results.values():
+            self.stdout.write(
+                f'{result["mode"]}: {result["rps"]} запросов/с, '
+                f'p50 {result["p50_ms"]} мс, p95 {result["p95_ms"]} мс, '
+                f'статусы {result["statuses"]}')
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+        self.stdout.write(f'Результаты записаны в {options["output"]}.')
+
+    def measure(self, mode, options):
+        command = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'),
+            'bench_deployments', '--mode', mode,
+            '--requests', str(options['requests']),
+            '--concurrency', str(options['concurrency']),
+        ]
+        if options['cache_pages']:
+            command.append('--cache-pages')
+        env = {**os.environ, 'BLOG_ASYNC_VIEWS': ASYNC_VIEWS[mode]}
+        completed = subprocess.run(command, env=env, capture_output=True,
+                                   text=True)
+        if completed.returncode:
+            raise CommandError(f'Замер {mode} завершился с ошибкой:\n'
+                               f'{completed.stderr}')
+        return json.loads(completed.stdout.strip().splitlines()[-1])
@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmark import page_urls, run_first_requests
+
+# Режим -> значение BLOG_TEMPLATE_WARMUP, с которым запускается процесс.
+WARMUP = {
+    'cold': '0',
+    'warm': '1',
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время первого запроса к страницам ленты, '
+            'категории, профиля и поста без прогрева шаблонов и с ним.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='first_request.json')
+        parser.add_argument('--mode', choices=sorted(WARMUP),
+                            help='Замерить один режим в этом процессе и '
+                                 'вывести JSON.')
+
+    def handle(self, *args, **options):
+        urls = page_urls()
+        if not urls:
+            raise CommandError('В базе нет видимых публикаций: заполните '
+                               'её командой seed_blog.')
+        if options['mode']:
+            result = run_first_requests(urls)
+            self.stdout.write(json.dumps({'mode': options['mode'],
+                                          **result}))
+            return
+        # Скомпилированные шаблоны живут до конца процесса, поэтому каждый
+        # режим замеряется в новом процессе.
+        results = {mode: self.measure(mode) for mode in WARMUP}
+        for result in results.values():
+            first = sum(result['first_ms'].values())
+            repeat = sum(result['repeat_ms'].values())
+            self.stdout.write(
+                f'{result["mode"]}: запуск {result["startup_ms"]} мс, '
+                f'первые запросы {first:.1f} мс, '
+                f'повторные {repeat:.1f} мс, '
+                f'статусы {result["statuses"]}')
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+        self.stdout.write(f'Результаты записаны в {options["output"]}.')
+
+    def measure(self, mode):
+        command = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'),
+            'bench_first_request', '--mode', mode,
+        ]
+        env = {**os.environ, 'BLOG_TEMPLATE_WARMUP': WARMUP[mode]}
+        completed = subprocess.run(command, env=env, capture_output=True,
+                                   text=True)
+        if completed.returncode:
+            raise CommandError(f'Замер {mode} завершился с ошибкой:\n'
+                               f'{completed.stderr}')
+        return json.loads(completed.stdout.strip().splitlines()[-1])
@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+
+from blog.benchmark import check_budgets, dump_report, run_benchmark
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку, число и время SQL-запросов и размер ответа '
+            'всех маршрутов blog/ и pages/ на базах разного размера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=[1000, 100000, 1000000])
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Не очищать кэш между запросами.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--budgets',
+                            help='JSON-файл с бюджетами вместо '
+                                 'BLOG_BENCHMARK_BUDGETS.')
+        parser.add_argument('--output', default='benchmark.json')
+
+    def handle(self, *args, **options):
+        budgets = None
+        if options['budgets']:
+            with open(options['budgets'], encoding='utf-8') as file:
+                budgets = json.load(file)
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            report = run_benchmark(
+                options['sizes'], repeat=options['repeat'],
+                warm_cache=options['warm_cache'], seed=options['seed'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        dump_report(report, options['output'])
+        self.stdout.write(f'Результаты записаны в {options["output"]}.')
+        violations = check_budgets(report, budgets)
+        if violations:
+            raise CommandError(
+                'Превышены бюджеты:\n' + '\n'.join(violations))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from blog.loading import load_fixture
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает дамп формата db.json пакетами bulk_create '
+            'в порядке зависимостей моделей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--ignore-conflicts', action='store_true',
+                            help='Пропускать строки с уже занятыми ключами.')
+
+    def handle(self, *args, fixture, batch_size, ignore_conflicts,
+               **options):
+        started = time.perf_counter()
+
+        def report(label, rows, elapsed):
+            rate = rows / elapsed if elapsed else 0
+            self.stdout.write(f'{label}: {rows} строк, {rate:.0f} строк/с')
+
+        loaded = load_fixture(fixture, batch_size=batch_size,
+                              ignore_conflicts=ignore_conflicts,
+                              report=report)
+        if loaded.get('blog.comment') or loaded.get('blog.post'):
+            call_command('reconcile_comment_counts', stdout=self.stdout)
+            call_command('reconcile_post_counters', stdout=self.stdout)
+        elapsed = time.perf_counter() - started
+        rows = sum(loaded.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {rows} строк за {elapsed:.1f} с '
+            f'({rows / elapsed:.0f} строк/с).'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from blog.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = ('Перестраивает полнотекстовый индекс постов (SQLite FTS5) '
+            'пакетами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, batch_size, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Полнотекстовый индекс есть только в SQLite.')
+        total = rebuild_search_index(
+            batch_size,
+            progress=lambda done: self.stdout.write(f'{done} постов'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано публикаций: {total}.'))
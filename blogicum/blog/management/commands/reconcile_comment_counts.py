@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = ('Сверяет Post.comment_count с фактическим числом комментариев '
+            'и исправляет расхождения пакетами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        counts = (Comment.objects
+                  .filter(post=OuterRef('pk'))
+                  .order_by()
+                  .values('post')
+                  .annotate(total=Count('id'))
+                  .values('total'))
+        last_id = 0
+        checked = fixed = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    Post.objects
+                    .filter(pk__gt=last_id)
+                    .order_by('pk')
+                    .annotate(actual=Coalesce(Subquery(counts), 0))
+                    .values_list('pk', 'comment_count', 'actual')
+                    [:batch_size]
+                )
+                if not batch:
+                    break
+                last_id = batch[-1][0]
+                checked += len(batch)
+                drifted = [pk for pk, stored, actual in batch
+                           if stored != actual]
+                if drifted:
+                    fixed += Post.objects.filter(pk__in=drifted).update(
+                        comment_count=Coalesce(Subquery(counts), 0))
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено публикаций: {checked}, исправлено: {fixed}.'))
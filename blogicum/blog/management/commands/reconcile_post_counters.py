@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.counters import recount_post_counters
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики постов ленты, категорий и авторов '
+            'и исправляет расхождения.')
+
+    def handle(self, *args, **options):
+        checked, fixed = recount_post_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено счётчиков: {checked}, исправлено: {fixed}.'))
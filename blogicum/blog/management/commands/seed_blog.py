@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.seeding import seed_blog
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу синтетическими пользователями, категориями, '
+            'местами, публикациями и комментариями.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--locations', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--comments-per-post', type=float, default=3.0)
+        parser.add_argument('--comment-skew', type=float, default=2.5,
+                            help='Форма распределения Парето (> 1).')
+        parser.add_argument('--unpublished-share', type=float, default=0.05)
+        parser.add_argument('--future-share', type=float, default=0.05)
+        parser.add_argument('--hidden-category-share', type=float,
+                            default=0.05)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        verbosity = options['verbosity']
+
+        def progress(model, total):
+            if verbosity > 1:
+                self.stdout.write(f'{model._meta.verbose_name_plural}: '
+                                  f'{total}')
+
+        try:
+            created = seed_blog(
+                users=options['users'],
+                categories=options['categories'],
+                locations=options['locations'],
+                posts=options['posts'],
+                comments_per_post=options['comments_per_post'],
+                comment_skew=options['comment_skew'],
+                unpublished_share=options['unpublished_share'],
+                future_share=options['future_share'],
+                hidden_category_share=options['hidden_category_share'],
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+                progress=progress,
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+        elapsed = time.perf_counter() - started
+        rows = sum(created.values())
+        summary = ', '.join(f'{name}: {count}'
+                            for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {summary} за {elapsed:.1f} с '
+            f'({rows / elapsed:.0f} строк/с).'))
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.db import sync_replica
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплики BLOG_REPLICAS '
+            'через backup API.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', action='append', dest='aliases',
+                            help='Алиас реплики; по умолчанию все.')
+        parser.add_argument('--pages', type=int, default=4096,
+                            help='Страниц за один шаг копирования.')
+
+    def handle(self, *args, aliases, pages, **options):
+        aliases = aliases or settings.BLOG_REPLICAS
+        if not aliases:
+            raise CommandError('Реплики не настроены: задайте '
+                               'BLOG_REPLICA_PATHS.')
+        unknown = set(aliases) - set(settings.BLOG_REPLICAS)
+        if unknown:
+            raise CommandError(
+                'Неизвестные реплики: ' + ', '.join(sorted(unknown)))
+        for alias in aliases:
+            copied = sync_replica(alias, pages=pages)
+            self.stdout.write(f'{alias}: скопировано страниц {copied}.')
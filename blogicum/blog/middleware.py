@@ -0,0 +1,351 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import parse_http_date_safe
+
+from .auth import get_user
+from .caching import (
+    CATEGORIES_SCOPE, FEED_SCOPE, GLOBAL_SCOPE, LOCATIONS_SCOPE, author_scope,
+    category_scope, get_scope_stamps
+)
+from .instrumentation import (
+    RECENT, QueryCollector, fingerprint_id, get_server_timings,
+    install_template_timing, instrument_queries, start_server_timings,
+    stop_server_timings
+)
+from .querysets import get_publish_now
+from .routers import is_pinned, read_from_replicas, read_stale_replica
+
+
+PAGE_SCOPES = {
+    'blog:index': lambda kwargs: (FEED_SCOPE,),
+    'blog:category_posts': lambda kwargs: (
+        category_scope(kwargs['category_slug']), LOCATIONS_SCOPE),
+    'blog:profile': lambda kwargs: (
+        author_scope(kwargs['username']), CATEGORIES_SCOPE, LOCATIONS_SCOPE),
+}
+STORED_HEADERS = ('Content-Type', 'Content-Language', 'X-Frame-Options',
+                  'ETag', 'Last-Modified')
+
+SERVER_TIMING_PARAM = 'server_timing'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+sql_logger = logging.getLogger('blog.sql')
+
+
+class HybridMiddleware:
+    """
+    Middleware, работающий и под WSGI, и под ASGI.
+
+    В цепочке с async-представлениями `__call__` возвращает корутину
+    `__acall__`, и Django не переключается на поток ради синхронного
+    middleware (см. `django.utils.deprecation.MiddlewareMixin`).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+
+class AnonymousPageCacheMiddleware(HybridMiddleware):
+    """
+    Кэш целых страниц ленты, категории и профиля для анонимных GET.
+
+    Стоит до SessionMiddleware: попадание в кэш отдаётся без обращения
+    к сессии, пользователю и базе данных. Ключ страницы включает отметки
+    её областей (см. `blog.caching`), которые обновляют сигналы моделей.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        entry, response = self.lookup(request)
+        if response is None:
+            response = self.get_response(request)
+            self.store(entry, response)
+        return response
+
+    async def __acall__(self, request):
+        entry, response = self.lookup(request)
+        if response is None:
+            response = await self.get_response(request)
+            self.store(entry, response)
+        return response
+
+    def lookup(self, request):
+        """
+        Запись кэша страницы — ключ и отметки её областей — и готовый
+        ответ из кэша, если он есть.
+        """
+        scopes = self.get_scopes(request)
+        if scopes is None:
+            return None, None
+        stamps = get_scope_stamps(GLOBAL_SCOPE, *scopes)
+        key = self.get_cache_key(request, stamps)
+        cached = cache.get(key)
+        if cached is None:
+            return (key, stamps), None
+        response = self.build_response(cached)
+        return (key, stamps), get_conditional_response(
+            request, etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified')),
+            response=response)
+
+    def store(self, entry, response):
+        """Страница с реплики, отстающей от её областей, не кэшируется."""
+        if entry is None or not self.can_store(response):
+            return
+        key, stamps = entry
+        if not read_stale_replica(max(stamps)):
+            cache.set(key, self.dump_response(response),
+                      settings.BLOG_PAGE_CACHE_TIMEOUT)
+
+    def get_scopes(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        get_scopes = PAGE_SCOPES.get(match.view_name)
+        return get_scopes(match.kwargs) if get_scopes else None
+
+    def get_cache_key(self, request, stamps):
+        """
+        Ключ включает и шаг «сейчас» фильтра ленты: отложенный пост
+        появляется на странице, как только наступает его время.
+        """
+        path = md5(request.get_full_path().encode()).hexdigest()
+        return 'page:{}:{}:{}'.format(
+            path, ':'.join(f'{stamp:.6f}' for stamp in stamps),
+            int(get_publish_now().timestamp()))
+
+    def can_store(self, response):
+        return (response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+                and 'private' not in response.get('Cache-Control', ''))
+
+    def dump_response(self, response):
+        headers = {name: response[name] for name in STORED_HEADERS
+                   if response.has_header(name)}
+        return response.status_code, headers, response.content
+
+    def build_response(self, cached):
+        status, headers, content = cached
+        response = HttpResponse(content, status=status)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+
+class QueryInstrumentationMiddleware(HybridMiddleware):
+    """
+    Замер SQL-запросов выборки HTTP-запросов.
+
+    Доля замеряемых запросов задаётся BLOG_SQL_SAMPLE_RATE, остальные
+    проходят без обёртки. Для замеренных запросов итог (число запросов,
+    время SQL, самые частые отпечатки) попадает в `instrumentation.RECENT`,
+    а отпечатки, повторившиеся больше BLOG_SQL_REPEAT_THRESHOLD раз,
+    пишутся в лог `blog.sql` строкой JSON.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.is_sampled():
+            return self.get_response(request)
+        collector = QueryCollector()
+        with instrument_queries(collector):
+            response = self.get_response(request)
+        self.record(request, response, collector)
+        return response
+
+    async def __acall__(self, request):
+        if not self.is_sampled():
+            return await self.get_response(request)
+        collector = QueryCollector()
+        with instrument_queries(collector):
+            response = await self.get_response(request)
+        self.record(request, response, collector)
+        return response
+
+    def is_sampled(self):
+        rate = settings.BLOG_SQL_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def record(self, request, response, collector):
+        match = getattr(request, 'resolver_match', None)
+        entry = {
+            'at': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            **collector.summary(),
+        }
+        RECENT.append(entry)
+        threshold = settings.BLOG_SQL_REPEAT_THRESHOLD
+        for key, count in collector.repeated(threshold):
+            sql_logger.warning(json.dumps({
+                'event': 'n_plus_one',
+                'path': entry['path'],
+                'view': entry['view'],
+                'fingerprint_id': fingerprint_id(key),
+                'count': count,
+                'threshold': threshold,
+                'fingerprint': key,
+            }, ensure_ascii=False))
+
+
+class ServerTimingMiddleware(HybridMiddleware):
+    """
+    Заголовок Server-Timing с фазами db, view, tpl, mw и total.
+
+    Стоит первым в MIDDLEWARE, чтобы `total` покрывал весь запрос, а `mw`
+    — работу остальных middleware. Дополнительно `inc` называет самый
+    долгий вложенный шаблон. Включается BLOG_SERVER_TIMING; персонал может
+    включить или выключить заголовок для одного запроса параметром
+    `?server_timing=1` / `?server_timing=0`.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        install_template_timing()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        requested = request.GET.get(SERVER_TIMING_PARAM)
+        if not settings.BLOG_SERVER_TIMING and requested is None:
+            return self.get_response(request)
+        started = time.perf_counter()
+        timings, token = start_server_timings()
+        try:
+            with instrument_queries(timings):
+                response = self.get_response(request)
+        finally:
+            stop_server_timings(token)
+        return self.add_header(request, response, timings, started, requested)
+
+    async def __acall__(self, request):
+        requested = request.GET.get(SERVER_TIMING_PARAM)
+        if not settings.BLOG_SERVER_TIMING and requested is None:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        timings, token = start_server_timings()
+        try:
+            with instrument_queries(timings):
+                response = await self.get_response(request)
+        finally:
+            stop_server_timings(token)
+        return self.add_header(request, response, timings, started, requested)
+
+    def add_header(self, request, response, timings, started, requested):
+        finished = time.perf_counter()
+        if self.is_enabled(request, requested):
+            handler = (finished - timings.handler_started
+                       if timings.handler_started else 0.0)
+            response['Server-Timing'] = timings.header(
+                finished - started, handler)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = get_server_timings()
+        if timings is not None:
+            timings.in_handler = True
+            timings.handler_started = time.perf_counter()
+
+    def is_enabled(self, request, requested):
+        user = getattr(request, 'user', None)
+        if requested is not None and user is not None and user.is_staff:
+            return requested != '0'
+        return settings.BLOG_SERVER_TIMING
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """
+    Чтения GET/HEAD-запросов к BLOG_REPLICA_NAMESPACES — на реплики.
+
+    Ответ на запрос с записью ставит cookie, закрепляющую клиента за
+    основной базой на BLOG_REPLICA_PIN_SECONDS: автор видит свои правки,
+    пока реплики их не получили. Без BLOG_REPLICAS ничего не делает.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.BLOG_REPLICAS:
+            return self.get_response(request)
+        with read_from_replicas(self.use_replicas(request)) as state:
+            response = self.get_response(request)
+        return self.pin(request, response, state)
+
+    async def __acall__(self, request):
+        if not settings.BLOG_REPLICAS:
+            return await self.get_response(request)
+        with read_from_replicas(self.use_replicas(request)) as state:
+            response = await self.get_response(request)
+        return self.pin(request, response, state)
+
+    def use_replicas(self, request):
+        if request.method not in ('GET', 'HEAD') or is_pinned(request):
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.namespace in settings.BLOG_REPLICA_NAMESPACES
+
+    def pin(self, request, response, state):
+        if state.wrote or request.method not in SAFE_METHODS:
+            seconds = settings.BLOG_REPLICA_PIN_SECONDS
+            response.set_cookie(
+                settings.BLOG_REPLICA_PIN_COOKIE,
+                str(int(time.time() + seconds)), max_age=seconds,
+                httponly=True, samesite='Lax')
+        return response
+
+
+class CachedAuthenticationMiddleware(HybridMiddleware,
+                                     AuthenticationMiddleware):
+    """
+    Замена AuthenticationMiddleware: пользователь сессии берётся из кэша.
+
+    Страница вошедшего пользователя не обращается к таблице auth_user,
+    пока он не изменит профиль или пароль (см. `blog.auth`). Наследование
+    от AuthenticationMiddleware нужно проверкам админки.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        self.set_user(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.set_user(request)
+        return await self.get_response(request)
+
+    def set_user(self, request):
+        request.user = SimpleLazyObject(lambda: get_user(request))
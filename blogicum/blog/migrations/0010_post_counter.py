@@ -0,0 +1,50 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:28
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_post_counters(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    PostCounter = apps.get_model('blog', 'PostCounter')
+    published = Post.objects.filter(is_published=True)
+    counters = [PostCounter(
+        scope='feed',
+        value=published.filter(category__is_published=True).count(),
+    )]
+    by_category = (published
+                   .filter(category__isnull=False)
+                   .order_by()
+                   .values_list('category')
+                   .annotate(total=Count('id')))
+    counters += [PostCounter(scope=f'category:{pk}', value=total)
+                 for pk, total in by_category]
+    by_author = (Post.objects
+                 .order_by()
+                 .values_list('author')
+                 .annotate(total=Count('id')))
+    counters += [PostCounter(scope=f'author:{pk}', value=total)
+                 for pk, total in by_author]
+    PostCounter.objects.bulk_create(counters, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCounter',
+            fields=[
+                ('scope', models.CharField(max_length=256, primary_key=True, serialize=False, verbose_name='Область')),
+                ('value', models.IntegerField(default=0, verbose_name='Число постов')),
+            ],
+            options={
+                'verbose_name': 'счётчик постов',
+                'verbose_name_plural': 'Счётчики постов',
+            },
+        ),
+        migrations.RunPython(fill_post_counters, migrations.RunPython.noop),
+    ]
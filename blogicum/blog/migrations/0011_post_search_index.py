@@ -0,0 +1,79 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:30
+
+import blog.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE blog_post_fts USING fts5(
+        title, text,
+        content='blog_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_insert AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_delete AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_post_fts_update AFTER UPDATE OF title, text
+    ON blog_post BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO blog_post_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')",
+)
+
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS blog_post_fts_insert',
+    'DROP TRIGGER IF EXISTS blog_post_fts_delete',
+    'DROP TRIGGER IF EXISTS blog_post_fts_update',
+    'DROP TABLE IF EXISTS blog_post_fts',
+)
+
+
+def run_sqlite(statements):
+    """Полнотекстовый индекс есть только в SQLite."""
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearchIndex',
+            fields=[
+                ('post', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='blog.post')),
+                ('title', blog.fields.FullTextField()),
+                ('text', blog.fields.FullTextField()),
+                ('document', blog.fields.FullTextField(db_column='blog_post_fts')),
+            ],
+            options={
+                'db_table': 'blog_post_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(run_sqlite(CREATE_SQL), run_sqlite(DROP_SQL)),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 
 from .constants import LENGTH_CHAR
+from .fields import FullTextField
 
 
 User = get_user_model()
@@ -59,6 +60,7 @@ class Post(PublishDateModel):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='posts',
         verbose_name='Автор публикации'
     )
@@ -74,6 +76,7 @@ class Post(PublishDateModel):
         Category,
         on_delete=models.SET_NULL,
         null=True,
+        db_index=False,
         related_name='posts',
         verbose_name='Категория'
     )
@@ -82,15 +85,82 @@ class Post(PublishDateModel):
         upload_to='posts_images',
         blank=True
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        indexes = (
+            models.Index(
+                fields=('pub_date', 'id'),
+                condition=models.Q(is_published=True),
+                name='post_published_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date', 'id'),
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('category', 'pub_date', 'id'),
+                name='post_category_pub_date_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
 
 
+class PostSearchIndex(models.Model):
+    """
+    Строка полнотекстового индекса постов (SQLite FTS5).
+
+    Таблица и триггеры, синхронизирующие её с Post, создаются миграцией;
+    модель нужна только для JOIN и lookup `document__match`.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index'
+    )
+    title = FullTextField()
+    text = FullTextField()
+    document = FullTextField(db_column='blog_post_fts')
+
+    class Meta:
+        managed = False
+        db_table = 'blog_post_fts'
+
+
+class PostCounter(models.Model):
+    """
+    Число постов ленты, категории или автора для пагинатора.
+
+    Поддерживается сигналами (см. `blog.counters`), расхождения исправляет
+    manage.py reconcile_post_counters.
+    """
+
+    scope = models.CharField(
+        max_length=LENGTH_CHAR,
+        primary_key=True,
+        verbose_name='Область'
+    )
+    value = models.IntegerField(default=0, verbose_name='Число постов')
+
+    class Meta:
+        verbose_name = 'счётчик постов'
+        verbose_name_plural = 'Счётчики постов'
+
+    def __str__(self):
+        return f'{self.scope}: {self.value}'
+
+
 class Comment(models.Model):
     text = models.TextField(verbose_name='Текст комментария')
     post = models.ForeignKey(
@@ -0,0 +1,180 @@
+import base64
+import datetime
+import json
+from collections.abc import Sequence
+from functools import reduce
+from operator import or_
+
+from django.core.paginator import InvalidPage, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .counters import get_count
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """В отличие от DjangoJSONEncoder не обрезает микросекунды."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации: без номера и без общего количества."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0])
+
+
+class CursorPaginator:
+    """
+    Keyset-пагинация по набору полей сортировки.
+
+    Вместо LIMIT/OFFSET и COUNT(*) страница выбирается условием
+    «строго после/до ключа» граничного объекта, поэтому стоимость запроса
+    не зависит от глубины страницы. Ключ передаётся в URL непрозрачным
+    токеном (`?after=` / `?before=`).
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-pub_date', '-id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = tuple(name.lstrip('-') for name in self.ordering)
+        self.descending = tuple(name.startswith('-') for name in self.ordering)
+
+    def _value(self, obj, name):
+        if isinstance(obj, dict):
+            return obj[name]
+        return getattr(obj, name)
+
+    def encode_cursor(self, obj):
+        values = [self._value(obj, name) for name in self.fields]
+        raw = json.dumps(values, cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def _field(self, name):
+        """Поле модели или аннотации, по которому идёт сортировка."""
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.queryset.model._meta.get_field(name)
+
+    def decode_cursor(self, token):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(
+                    self.fields):
+                raise ValueError(token)
+            return tuple(
+                self._field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            )
+        except Exception:
+            raise InvalidCursor('Некорректный курсор страницы.')
+
+    def _seek(self, values, forward):
+        """Условие «строго после ключа» в направлении обхода."""
+        conditions = []
+        for index, name in enumerate(self.fields):
+            use_lt = self.descending[index] == forward
+            lookup = f'{name}__lt' if use_lt else f'{name}__gt'
+            equal = {
+                self.fields[prev]: values[prev] for prev in range(index)
+            }
+            conditions.append(Q(**equal, **{lookup: values[index]}))
+        return reduce(or_, conditions)
+
+    def _reversed_ordering(self):
+        return tuple(
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        )
+
+    def page(self, after=None, before=None):
+        if after and before:
+            raise InvalidCursor('Нельзя указать after и before одновременно.')
+        queryset = self.queryset.order_by(*self.ordering)
+        if before:
+            queryset = (queryset
+                        .filter(self._seek(self.decode_cursor(before),
+                                           forward=False))
+                        .order_by(*self._reversed_ordering()))
+        elif after:
+            queryset = queryset.filter(
+                self._seek(self.decode_cursor(after), forward=True))
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if before:
+            items.reverse()
+            return CursorPage(items, self, has_next=True,
+                              has_previous=has_more)
+        return CursorPage(items, self, has_next=has_more,
+                          has_previous=bool(after))
+
+
+class CountedPaginator(Paginator):
+    """
+    Постраничный пагинатор, берущий общее число постов из PostCounter.
+
+    Вместо COUNT(*) по всей выборке с JOIN читается одна строка счётчика;
+    из неё вычитаются отложенные посты `scheduled` — их немного, и они
+    считаются по индексу дат публикации.
+    """
+
+    def __init__(self, object_list, per_page, counter, scheduled=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.counter = counter
+        self.scheduled = scheduled
+
+    @cached_property
+    def count(self):
+        total = get_count(self.counter)
+        if self.scheduled is not None:
+            total -= self.scheduled.count()
+        return max(total, 0)
@@ -1,18 +1,70 @@
-from django.db.models import Count
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
 from django.utils import timezone
 
+from .models import Post
+
+
+def get_publish_now():
+    """
+    Текущее время, округлённое вниз до BLOG_PUBLISH_TIME_BUCKET секунд.
+
+    В пределах одного интервала SQL ленты и ключи кэша не меняются.
+    """
+    now = timezone.now()
+    bucket = settings.BLOG_PUBLISH_TIME_BUCKET
+    if bucket <= 1:
+        return now
+    timestamp = now.timestamp()
+    return datetime.fromtimestamp(timestamp - timestamp % bucket,
+                                  tz=dt_timezone.utc)
+
 
 def filter_profile_post_list(query):
     return (query
             .select_related('author', 'category', 'location')
-            .annotate(comment_count=Count('comments'))
-            .order_by('-pub_date')
+            .order_by('-pub_date', '-id')
             )
 
 
-def add_filter_post_list(query):
-    return (query.filter(
+def published_q(now=None):
+    return Q(
+        is_published=True,
+        category__is_published=True,
+        pub_date__lte=now or get_publish_now(),
+    )
+
+
+def add_filter_post_list(query, now=None):
+    return query.filter(published_q(now))
+
+
+def get_feed_queryset(now=None):
+    """Лента опубликованных постов; собирается заново на каждый запрос."""
+    return add_filter_post_list(filter_profile_post_list(Post.objects), now)
+
+
+def get_scheduled_queryset(now=None):
+    """Опубликованные посты, время которых ещё не наступило."""
+    return Post.objects.filter(
         is_published=True,
         category__is_published=True,
-        pub_date__date__lt=timezone.now(),)
+        pub_date__gt=now or get_publish_now(),
     )
+
+
+def get_visible_post_queryset(user):
+    """
+    Пост со всеми связями для страницы публикации одним запросом.
+
+    Снятый с публикации, отложенный или скрытый вместе с категорией пост
+    виден только автору.
+    """
+    visible = published_q(timezone.now())
+    if user.is_authenticated:
+        visible |= Q(author_id=user.pk)
+    return (Post.objects
+            .select_related('author', 'category', 'location')
+            .filter(visible))
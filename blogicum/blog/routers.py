@@ -0,0 +1,108 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .caching import shared_cache
+
+
+class RoutingState:
+    """Маршрутизация одного HTTP-запроса; общая для всех его потоков."""
+
+    def __init__(self, replicas):
+        self.replicas = replicas
+        self.wrote = False
+        self.used = set()
+
+
+_routing = ContextVar('blog_routing', default=None)
+
+
+@contextmanager
+def read_from_replicas(replicas=True):
+    """
+    Чтения моделей BLOG_REPLICA_APPS внутри блока идут на реплики.
+
+    Первая же запись возвращает оставшиеся чтения блока на основную базу,
+    чтобы запрос видел свои изменения.
+    """
+    state = RoutingState(replicas)
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def _synced_key(alias):
+    return f'replica_synced:{alias}'
+
+
+def mark_replica_synced(alias, when):
+    """Реплика `alias` содержит все изменения основной базы до `when`."""
+    shared_cache.set(_synced_key(alias), when, timeout=None)
+
+
+def read_stale_replica(changed_at):
+    """
+    Читал ли текущий запрос реплику, скопированную раньше `changed_at`.
+
+    Ответ с такой реплики нельзя кэшировать и снабжать валидаторами: после
+    синхронизации страница с теми же отметками областей будет другой.
+    Время копирования хранится в общем кэше и известно всем процессам.
+    """
+    state = _routing.get()
+    if state is None or not state.used:
+        return False
+    synced = shared_cache.get_many([_synced_key(alias)
+                                    for alias in state.used])
+    return any(synced.get(_synced_key(alias), 0) < changed_at
+               for alias in state.used)
+
+
+def pinned_until(request):
+    """Время, до которого запрос закреплён за основной базой, или 0."""
+    try:
+        return float(request.COOKIES.get(settings.BLOG_REPLICA_PIN_COOKIE))
+    except (TypeError, ValueError):
+        return 0
+
+
+def is_pinned(request):
+    return pinned_until(request) > time.time()
+
+
+class ReplicaRouter:
+    """
+    Чтения контента блога в GET-запросах — на реплики BLOG_REPLICAS,
+    остальное — на основную базу.
+
+    Реплики — копии основной базы (см. `manage.py sync_replica`), поэтому
+    связи между объектами разных алиасов разрешены, а миграции на реплики
+    не применяются.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if (state is None or not state.replicas or state.wrote
+                or not settings.BLOG_REPLICAS
+                or model._meta.app_label not in settings.BLOG_REPLICA_APPS):
+            return DEFAULT_DB_ALIAS
+        alias = random.choice(settings.BLOG_REPLICAS)
+        state.used.add(alias)
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.BLOG_REPLICAS
@@ -0,0 +1,95 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import CharField, FloatField
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+from .querysets import add_filter_post_list, filter_profile_post_list
+
+
+MAX_TERMS = 8
+SNIPPET_WORDS = 24
+# Управляющие символы не встречаются в тексте постов и не теряются при
+# экранировании, поэтому ими размечаются совпадения до вывода в HTML.
+MARK_START, MARK_END = '\x02', '\x03'
+# Заголовок весит больше текста.
+RANK_SQL = 'bm25("blog_post_fts", 10.0, 1.0)'
+
+
+def build_match_query(text):
+    """
+    Запрос FTS5 из строки пользователя.
+
+    Операторы FTS5 не передаются: каждое слово берётся в кавычки как
+    префикс, слова объединяются через AND.
+    """
+    words = re.findall(r'\w+', text)[:MAX_TERMS]
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_posts(text, now=None):
+    """
+    Видимые посты по полнотекстовому запросу с рангом и фрагментами.
+
+    Аннотации: `rank` (bm25, меньше — лучше), `title_highlight`
+    и `snippet` с совпадениями между MARK_START и MARK_END.
+    """
+    query = build_match_query(text)
+    queryset = filter_profile_post_list(Post.objects).annotate(
+        rank=RawSQL(RANK_SQL, (), output_field=FloatField()),
+        title_highlight=RawSQL(
+            'highlight("blog_post_fts", 0, %s, %s)',
+            (MARK_START, MARK_END), output_field=CharField()),
+        snippet=RawSQL(
+            'snippet("blog_post_fts", 1, %s, %s, %s, %s)',
+            (MARK_START, MARK_END, '…', SNIPPET_WORDS),
+            output_field=CharField()),
+    )
+    if not query:
+        return queryset.none()
+    return add_filter_post_list(
+        queryset.filter(search_index__document__match=query), now)
+
+
+def render_marks(text):
+    """HTML с совпадениями в <mark>; остальной текст экранируется."""
+    html = escape(text or '')
+    return mark_safe(html.replace(MARK_START, '<mark>')
+                     .replace(MARK_END, '</mark>'))
+
+
+def rebuild_search_index(batch_size=5000, progress=None):
+    """
+    Перестраивает индекс FTS5 пакетами по возрастанию id.
+
+    Каждый пакет вставляется в своей транзакции, так что запись в базу
+    не блокируется на всё время перестройки. Возвращает число постов.
+    """
+    last_id = total = 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('delete-all')")
+        while True:
+            with transaction.atomic():
+                cursor.execute(
+                    'INSERT INTO blog_post_fts(rowid, title, text) '
+                    'SELECT id, title, text FROM blog_post '
+                    'WHERE id > %s ORDER BY id LIMIT %s',
+                    [last_id, batch_size])
+                inserted = cursor.rowcount
+                if inserted <= 0:
+                    break
+                cursor.execute(
+                    'SELECT MAX(id) FROM (SELECT id FROM blog_post '
+                    'WHERE id > %s ORDER BY id LIMIT %s)',
+                    [last_id, batch_size])
+                last_id = cursor.fetchone()[0]
+            total += inserted
+            if progress:
+                progress(total)
+        cursor.execute(
+            "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('optimize')")
+    return total
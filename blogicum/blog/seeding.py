@@ -0,0 +1,168 @@
+import random
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .counters import recount_post_counters
+from .models import Category, Comment, Location, Post
+
+
+User = get_user_model()
+
+WORDS = (
+    'утро кофе город дождь прогулка книга друг поезд море работа вечер кот '
+    'собака парк музей письмо окно чай дорога лес река мост снег солнце '
+    'концерт кино рынок соседи велосипед дача гроза сон завтрак автобус'
+).split()
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def _insert(model, objects, batch_size, progress=None):
+    """Вставляет объекты пакетами, каждый пакет в своей транзакции."""
+    objects = iter(objects)
+    total = 0
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return total
+        with transaction.atomic():
+            model.objects.bulk_create(batch, batch_size=batch_size)
+        total += len(batch)
+        if progress:
+            progress(model, total)
+
+
+def _words(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high)))
+
+
+def _text_pool(rng, low, high, size=1024):
+    """Набор готовых текстов: генерировать свой на каждую строку дорого."""
+    return [_words(rng, low, high) for _ in range(size)]
+
+
+def _comment_counts(rng, posts, mean, skew):
+    """
+    Число комментариев на пост из распределения Парето.
+
+    `skew` — параметр формы: чем он меньше, тем сильнее комментарии
+    сосредоточены на немногих популярных постах; среднее равно `mean`.
+    """
+    scale = mean * (skew - 1)
+    for _ in range(posts):
+        yield round(scale * (rng.paretovariate(skew) - 1))
+
+
+def seed_blog(users=100, categories=10, locations=20, posts=1000,
+              comments_per_post=3.0, comment_skew=2.5,
+              unpublished_share=0.05, future_share=0.05,
+              hidden_category_share=0.05, seed=0, batch_size=5000,
+              progress=None):
+    """
+    Добавляет в базу синтетические данные блога.
+
+    Значения выбираются детерминированно из `seed`, у каждой таблицы свой
+    генератор, так что размер одной не сдвигает значения другой. Если
+    пользователей, категорий или мест просят 0, используются уже
+    существующие. Доли
+    `*_share` задают смесь опубликованных, снятых с публикации,
+    отложенных постов и постов в скрытых категориях. Хотя бы одна
+    категория остаётся опубликованной; ValueError, если опубликованных
+    категорий для постов нет совсем.
+    """
+    hidden = min(max(1 if hidden_category_share else 0,
+                     round(categories * hidden_category_share)),
+                 max(categories - 1, 0))
+    if (posts and categories == hidden
+            and not Category.objects.filter(is_published=True).exists()):
+        raise ValueError('Нет опубликованных категорий для публикаций: '
+                         'задайте число категорий больше нуля.')
+    now = timezone.now()
+    created = {}
+
+    first_user = _next_id(User)
+    password = make_password('password')
+    created['users'] = _insert(User, (
+        User(pk=pk, username=f'user_{pk}', password=password,
+             email=f'user_{pk}@example.com')
+        for pk in range(first_user, first_user + users)
+    ), batch_size, progress)
+
+    category_rng = random.Random(f'{seed}:categories')
+    first_category = _next_id(Category)
+    created['categories'] = _insert(Category, (
+        Category(pk=pk, title=_words(category_rng, 1, 3).capitalize(),
+                 slug=f'category-{pk}',
+                 description=_words(category_rng, 10, 30),
+                 is_published=index >= hidden)
+        for index, pk in enumerate(
+            range(first_category, first_category + categories))
+    ), batch_size, progress)
+
+    location_rng = random.Random(f'{seed}:locations')
+    first_location = _next_id(Location)
+    created['locations'] = _insert(Location, (
+        Location(pk=pk, name=_words(location_rng, 1, 2).capitalize())
+        for pk in range(first_location, first_location + locations)
+    ), batch_size, progress)
+
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    location_ids = list(Location.objects.values_list('pk', flat=True))
+    location_ids.append(None)
+    visible_ids = list(Category.objects.filter(is_published=True)
+                       .values_list('pk', flat=True))
+    hidden_ids = list(Category.objects.filter(is_published=False)
+                      .values_list('pk', flat=True)) or visible_ids
+
+    rng = random.Random(f'{seed}:posts')
+    titles = [text.capitalize() for text in _text_pool(rng, 2, 6)]
+    texts = _text_pool(rng, 20, 200)
+    comment_texts = _text_pool(rng, 3, 40)
+    first_post = _next_id(Post)
+    counts = list(_comment_counts(rng, posts, comments_per_post,
+                                  comment_skew))
+
+    def make_posts():
+        for index, pk in enumerate(range(first_post, first_post + posts)):
+            roll = rng.random()
+            pub_date = now - timedelta(minutes=rng.randint(1, 10 ** 7))
+            category = rng.choice(visible_ids)
+            is_published = True
+            if roll < unpublished_share:
+                is_published = False
+            elif roll < unpublished_share + future_share:
+                pub_date = now + timedelta(minutes=rng.randint(1, 10 ** 5))
+            elif roll < (unpublished_share + future_share
+                         + hidden_category_share):
+                category = rng.choice(hidden_ids)
+            yield Post(
+                pk=pk, title=rng.choice(titles),
+                text=rng.choice(texts), pub_date=pub_date,
+                is_published=is_published, author_id=rng.choice(user_ids),
+                category_id=category,
+                location_id=rng.choice(location_ids),
+                comment_count=counts[index],
+            )
+
+    created['posts'] = _insert(Post, make_posts(), batch_size, progress)
+
+    def make_comments():
+        for index, count in enumerate(counts):
+            for _ in range(count):
+                yield Comment(post_id=first_post + index,
+                              author_id=rng.choice(user_ids),
+                              text=rng.choice(comment_texts))
+
+    created['comments'] = _insert(Comment, make_comments(), batch_size,
+                                  progress)
+    # bulk_create обходит сигналы, поддерживающие PostCounter.
+    recount_post_counters()
+    return created
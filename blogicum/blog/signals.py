@@ -0,0 +1,302 @@
+import logging
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from .auth import forget_user
+from .caching import (
+    CATEGORIES_SCOPE, FEED_SCOPE, LOCATIONS_SCOPE, SITEMAP_VISIBILITY_SCOPE,
+    author_scope, category_scope, location_scope, post_scope, sitemap_scope,
+    touch_scopes
+)
+from .counters import (
+    FEED_COUNTER, adjust_counters, category_counter, post_counter_deltas,
+    post_counters
+)
+from .images import delete_variants, generate_variants
+from .models import Category, Comment, Location, Post, PostCounter
+
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+_deleting = threading.local()
+
+
+def _posts_being_deleted():
+    if not hasattr(_deleting, 'post_ids'):
+        _deleting.post_ids = set()
+    return _deleting.post_ids
+
+
+def _post_scopes(category_slug, username):
+    """Области кэша страниц, на которых показывается пост."""
+    return (FEED_SCOPE,
+            category_slug and category_scope(category_slug),
+            author_scope(username))
+
+
+def _load_post_scopes(post_id):
+    row = (Post.objects
+           .filter(pk=post_id)
+           .values_list('category__slug', 'author__username')
+           .first())
+    return _post_scopes(*row) if row else ()
+
+
+def _load_post_state(post_id):
+    """Области кэша, счётчики и изображение поста в состоянии из базы."""
+    row = (Post.objects
+           .filter(pk=post_id)
+           .values_list('category__slug', 'author__username', 'image',
+                        'is_published', 'category_id',
+                        'category__is_published', 'author_id')
+           .first())
+    if row is None:
+        return (), (), None
+    return _post_scopes(*row[:2]), post_counters(*row[3:]), row[2]
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post(sender, instance, **kwargs):
+    """
+    Комментарии удаляемого поста удаляются каскадом до самого поста:
+    пересчитывать счётчик строки, которая сейчас исчезнет, незачем.
+    """
+    _posts_being_deleted().add(instance.pk)
+    instance._page_scopes, instance._counters, _ = (
+        _load_post_state(instance.pk))
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleted_post(sender, instance, **kwargs):
+    _posts_being_deleted().discard(instance.pk)
+    touch_scopes(*instance._page_scopes, post_scope(instance.pk),
+                 sitemap_scope('posts', instance.pk))
+    adjust_counters({counter: -1 for counter in instance._counters})
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_post(sender, instance, raw=False, **kwargs):
+    instance._page_scopes = instance._counters = ()
+    instance._previous_image = None
+    if instance.pk and not raw:
+        (instance._page_scopes, instance._counters,
+         instance._previous_image) = _load_post_state(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    touch_scopes(*getattr(instance, '_page_scopes', ()),
+                 *_load_post_scopes(instance.pk), post_scope(instance.pk),
+                 sitemap_scope('posts', instance.pk))
+
+
+@receiver(post_save, sender=Post)
+def update_post_counters(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    category_published = bool(instance.category_id) and (
+        Category.objects
+        .filter(pk=instance.category_id, is_published=True)
+        .exists())
+    current = post_counters(instance.is_published, instance.category_id,
+                            category_published, instance.author_id)
+    adjust_counters(post_counter_deltas(
+        getattr(instance, '_counters', ()), current))
+
+
+@receiver(post_save, sender=Post)
+def refresh_image_variants(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_image', None)
+    if raw or (previous or '') == instance.image.name:
+        return
+    if previous:
+        delete_variants(previous, instance.image.storage)
+    if instance.image:
+        try:
+            generate_variants(instance.image)
+        except (OSError, ValueError):
+            logger.exception('Не удалось создать варианты изображения %s',
+                             instance.image.name)
+
+
+@receiver(post_delete, sender=Post)
+def delete_image_variants(sender, instance, **kwargs):
+    if instance.image:
+        delete_variants(instance.image.name, instance.image.storage)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    if instance.post_id in _posts_being_deleted():
+        return
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    if instance.post_id in _posts_being_deleted():
+        return
+    touch_scopes(*_load_post_scopes(instance.post_id),
+                 post_scope(instance.post_id))
+
+
+def _published_in_category(category_id):
+    return Post.objects.filter(category_id=category_id,
+                               is_published=True).count()
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_status(sender, instance, raw=False, **kwargs):
+    instance._was_published = instance._previous_slug = None
+    if instance.pk and not raw:
+        instance._was_published, instance._previous_slug = (
+            Category.objects
+            .filter(pk=instance.pk)
+            .values_list('is_published', 'slug')
+            .first() or (None, None))
+
+
+@receiver(post_save, sender=Category)
+def update_feed_counter(sender, instance, raw=False, **kwargs):
+    """Снятие категории с публикации убирает её посты из ленты."""
+    was_published = getattr(instance, '_was_published', None)
+    if raw or was_published is None:
+        return
+    if was_published != instance.is_published:
+        total = _published_in_category(instance.pk)
+        sign = 1 if instance.is_published else -1
+        adjust_counters({FEED_COUNTER: sign * total})
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_posts(sender, instance, **kwargs):
+    instance._feed_posts = (_published_in_category(instance.pk)
+                            if instance.is_published else 0)
+
+
+@receiver(post_delete, sender=Category)
+def drop_category_counter(sender, instance, **kwargs):
+    adjust_counters({FEED_COUNTER: -getattr(instance, '_feed_posts', 0)})
+    PostCounter.objects.filter(scope=category_counter(instance.pk)).delete()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_pages(sender, instance, **kwargs):
+    """
+    Название и статус категории выводятся в ленте, на её странице (в том
+    числе по прежнему адресу после смены slug), на страницах её постов
+    и авторов. Страницы постов зависят от области категории, страницы
+    авторов — от общей `CATEGORIES_SCOPE`, так что число сбрасываемых
+    областей не зависит от числа постов.
+    """
+    previous_slug = getattr(instance, '_previous_slug', None)
+    touch_scopes(FEED_SCOPE, CATEGORIES_SCOPE, category_scope(instance.slug),
+                 previous_slug and category_scope(previous_slug))
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_location_pages(sender, instance, **kwargs):
+    """Название и статус места: лента, страницы его постов и списков."""
+    touch_scopes(FEED_SCOPE, LOCATIONS_SCOPE, location_scope(instance.pk))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_sitemap(sender, instance, **kwargs):
+    touch_scopes(sitemap_scope('categories', instance.pk),
+                 SITEMAP_VISIBILITY_SCOPE)
+
+
+def _login_only(update_fields):
+    return update_fields is not None and set(update_fields) <= {'last_login'}
+
+
+def _renamed_user_scopes(user, previous_username):
+    """Области страниц с именем пользователя: его постов и комментариев."""
+    scopes = {FEED_SCOPE, author_scope(previous_username)}
+    posts = (Post.objects
+             .filter(author=user)
+             .values_list('pk', 'category__slug'))
+    for pk, category_slug in posts.iterator():
+        scopes.update((post_scope(pk),
+                       category_slug and category_scope(category_slug)))
+    commented = (Comment.objects
+                 .filter(author=user)
+                 .values_list('post_id', flat=True)
+                 .distinct())
+    scopes.update(post_scope(pk) for pk in commented.iterator())
+    return scopes
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, raw=False, update_fields=None,
+                      **kwargs):
+    instance._previous_username = None
+    if instance.pk and not raw and not _login_only(update_fields):
+        instance._previous_username = (User.objects
+                                       .filter(pk=instance.pk)
+                                       .values_list('username', flat=True)
+                                       .first())
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_pages(sender, instance, created, raw=False,
+                          update_fields=None, **kwargs):
+    """
+    Профиль выводится на странице автора, а имя — ещё и в карточках его
+    постов, на их страницах и на страницах постов с его комментариями.
+    Их области сбрасываются, только если имя изменилось. Новый
+    пользователь пока есть только в sitemap, а обновление одного
+    `last_login` при входе страниц не меняет.
+    """
+    if _login_only(update_fields):
+        return
+    touch_scopes(sitemap_scope('profiles', instance.pk))
+    if created or raw:
+        return
+    scopes = {author_scope(instance.username)}
+    previous = getattr(instance, '_previous_username', None)
+    if previous and previous != instance.username:
+        scopes |= _renamed_user_scopes(instance, previous)
+    touch_scopes(*scopes)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_user_sitemap(sender, instance, **kwargs):
+    touch_scopes(sitemap_scope('profiles', instance.pk))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    """Пароль, активность и профиль в закэшированном пользователе устарели."""
+    forget_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def forget_user_permissions(sender, instance, reverse, pk_set, **kwargs):
+    if not reverse:
+        forget_user(instance.pk)
+    elif pk_set:
+        for pk in pk_set:
+            forget_user(pk)
@@ -0,0 +1,231 @@
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import caching
+from .caching import (
+    SITEMAP_VISIBILITY_SCOPE, cache_chunks, digest, get_scope_stamps,
+    make_etag, sitemap_scope
+)
+from .constants import SITEMAP_SHARD_SIZE
+from .models import Category, Post
+from .querysets import add_filter_post_list, get_publish_now
+from .routers import read_stale_replica
+
+
+User = get_user_model()
+
+BATCH_SIZE = 2000
+CONTENT_TYPE = 'application/xml; charset=utf-8'
+HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+          '<{} xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+# Заведомо невозможное значение аргумента URL: по нему шаблон адреса
+# получается одним reverse() на файл, а не на каждую строку.
+SENTINEL = 'sitemap-sentinel-0'
+SLUG_RE = r'^[-a-zA-Z0-9_]+$'
+
+
+def _url_template(name, sentinel=SENTINEL):
+    return reverse(name, args=[sentinel]).replace(str(sentinel), '{}')
+
+
+def _format_date(value):
+    return value.isoformat(timespec='seconds')
+
+
+class SitemapSection:
+    """
+    Раздел sitemap, разбитый на файлы по диапазонам id.
+
+    Файл `shard` содержит объекты с id из (shard * N, (shard + 1) * N],
+    поэтому в нём не больше N адресов, а строки читаются порциями по
+    первичному ключу без OFFSET. Кэш файла привязан к отметке его
+    диапазона (см. `caching.sitemap_scope`), которую обновляют сигналы:
+    новый пост меняет только последний файл.
+    """
+
+    name = None
+    model = None
+    url_name = None
+    url_sentinel = SENTINEL
+    # Поле аргумента URL и условия видимости объектов раздела.
+    url_field = 'id'
+    filters = {}
+    # Области, влияющие на все файлы раздела.
+    scopes = ()
+
+    def get_queryset(self, now):
+        """values_list('id', аргумент URL[, lastmod]) видимых объектов."""
+        return (self.model.objects
+                .filter(**self.filters)
+                .values_list('id', self.url_field))
+
+    def describe(self, start, end, now):
+        """{'count', 'lastmod', 'next_change'} для диапазона id."""
+        queryset = self.get_queryset(now).filter(id__gt=start, id__lte=end)
+        return {'count': queryset.count(), 'lastmod': None,
+                'next_change': None}
+
+    def get_scopes(self, shard):
+        return (sitemap_scope(self.name, shard * SITEMAP_SHARD_SIZE + 1),
+                *self.scopes)
+
+    def get_shards(self):
+        last_id = self.model.objects.aggregate(last=Max('id'))['last']
+        if not last_id:
+            return range(0)
+        return range(caching.sitemap_shard(last_id) + 1)
+
+    def iter_rows(self, start, end, now):
+        queryset = self.get_queryset(now).order_by('id')
+        while True:
+            rows = list(queryset.filter(id__gt=start, id__lte=end)
+                        [:BATCH_SIZE])
+            if not rows:
+                return
+            yield rows
+            start = rows[-1][0]
+
+    def iter_xml(self, shard, base, now):
+        template = base + _url_template(self.url_name, self.url_sentinel)
+        start = shard * SITEMAP_SHARD_SIZE
+        yield HEADER.format('urlset')
+        for rows in self.iter_rows(start, start + SITEMAP_SHARD_SIZE, now):
+            parts = []
+            for row in rows:
+                parts.append(
+                    f'<url><loc>{escape(template.format(row[1]))}</loc>')
+                if len(row) > 2:
+                    parts.append(f'<lastmod>{_format_date(row[2])}</lastmod>')
+                parts.append('</url>\n')
+            yield ''.join(parts)
+        yield '</urlset>\n'
+
+
+class PostSection(SitemapSection):
+    name = 'posts'
+    model = Post
+    url_name = 'blog:post_detail'
+    url_sentinel = 999999999
+    scopes = (SITEMAP_VISIBILITY_SCOPE,)
+
+    def get_queryset(self, now):
+        return (add_filter_post_list(Post.objects.all(), now)
+                .values_list('id', 'id', 'pub_date'))
+
+    def describe(self, start, end, now):
+        """
+        Отложенные посты диапазона дают `next_change`: когда он наступит,
+        описание и файл будут построены заново.
+        """
+        visible = Q(pub_date__lte=now)
+        return (Post.objects
+                .filter(is_published=True, category__is_published=True,
+                        id__gt=start, id__lte=end)
+                .aggregate(count=Count('id', filter=visible),
+                           lastmod=Max('pub_date', filter=visible),
+                           next_change=Min('pub_date', filter=~visible)))
+
+
+class CategorySection(SitemapSection):
+    name = 'categories'
+    model = Category
+    url_name = 'blog:category_posts'
+    url_field = 'slug'
+    filters = {'is_published': True}
+
+
+class ProfileSection(SitemapSection):
+    name = 'profiles'
+    model = User
+    url_name = 'blog:profile'
+    url_field = 'username'
+    # Профили доступны только по именам-слагам.
+    filters = {'is_active': True, 'username__regex': SLUG_RE}
+
+
+SECTIONS = {
+    section.name: section
+    for section in (PostSection(), CategorySection(), ProfileSection())
+}
+
+
+def get_shard_meta(section, shard, stamps, now):
+    """Описание файла sitemap; с отстающей реплики оно не кэшируется."""
+    key = f'sitemap-meta:{section.name}:{shard}:' + digest(*stamps)
+    meta = cache.get(key)
+    if meta is None or (meta['next_change'] and meta['next_change'] <= now):
+        start = shard * SITEMAP_SHARD_SIZE
+        meta = section.describe(start, start + SITEMAP_SHARD_SIZE, now)
+        if not read_stale_replica(max(stamps)):
+            cache.set(key, meta, settings.BLOG_SITEMAP_CACHE_TIMEOUT)
+    return meta
+
+
+def sitemap_index(request):
+    """Индекс файлов sitemap всех разделов, кроме пустых."""
+    now = get_publish_now()
+    parts = [HEADER.format('sitemapindex')]
+    for section in SECTIONS.values():
+        shards = section.get_shards()
+        scopes = [section.get_scopes(shard) for shard in shards]
+        unique = list(dict.fromkeys(
+            scope for group in scopes for scope in group))
+        stamp_of = dict(zip(unique, get_scope_stamps(*unique)))
+        for shard, group in zip(shards, scopes):
+            meta = get_shard_meta(
+                section, shard, [stamp_of[scope] for scope in group], now)
+            if not meta['count']:
+                continue
+            location = request.build_absolute_uri(reverse(
+                'blog:sitemap_shard', args=[section.name, shard]))
+            parts.append(f'<sitemap><loc>{escape(location)}</loc>')
+            if meta['lastmod']:
+                parts.append(
+                    f'<lastmod>{_format_date(meta["lastmod"])}</lastmod>')
+            parts.append('</sitemap>\n')
+    parts.append('</sitemapindex>\n')
+    return HttpResponse(''.join(parts), content_type=CONTENT_TYPE)
+
+
+def sitemap_shard(request, section, shard):
+    """Один файл sitemap: потоком при промахе кэша, из кэша при попадании."""
+    section = SECTIONS.get(section)
+    if section is None:
+        raise Http404('Неизвестный раздел sitemap.')
+    now = get_publish_now()
+    stamps = get_scope_stamps(*section.get_scopes(shard))
+    meta = get_shard_meta(section, shard, stamps, now)
+    if not meta['count']:
+        raise Http404('Файл sitemap пуст.')
+    parts = (request.get_host(), section.name, shard, *stamps,
+             meta['count'], meta['lastmod'])
+    etag = make_etag(*parts)
+    last_modified = (int(meta['lastmod'].timestamp())
+                     if meta['lastmod'] else None)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        key = 'sitemap:' + digest(*parts)
+        content = cache.get(key)
+        if content is not None:
+            response = HttpResponse(content, content_type=CONTENT_TYPE)
+        else:
+            base = request.build_absolute_uri('/')[:-1]
+            chunks = section.iter_xml(shard, base, now)
+            if not read_stale_replica(max(stamps)):
+                chunks = cache_chunks(chunks, key,
+                                      settings.BLOG_SITEMAP_CACHE_TIMEOUT)
+            response = StreamingHttpResponse(chunks,
+                                             content_type=CONTENT_TYPE)
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
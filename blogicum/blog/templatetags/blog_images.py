@@ -0,0 +1,14 @@
+from django import template
+
+from ..images import get_variant_url
+
+
+register = template.Library()
+
+
+@register.filter
+def variant_url(image, variant):
+    """{{ post.image|variant_url:'card' }}"""
+    if not image:
+        return ''
+    return get_variant_url(image, variant)
@@ -0,0 +1,12 @@
+from django import template
+
+from ..search import render_marks
+
+
+register = template.Library()
+
+
+@register.filter
+def search_marks(text):
+    """{{ post.snippet|search_marks }}"""
+    return render_marks(text)
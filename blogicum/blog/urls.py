@@ -1,12 +1,15 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, sitemaps, views
+from .async_views import page_view
 
 app_name = 'blog'
 
 urlpatterns = [
-    path('', views.PostListView.as_view(), name='index'),
-    path('posts/<int:post_id>/', views.PostDetailView.as_view(),
+    path('', page_view(views.PostListView), name='index'),
+    path('feed/<slug:feed_format>/', feeds.PostFeedView.as_view(),
+         name='feed'),
+    path('posts/<int:post_id>/', page_view(views.PostDetailView),
          name='post_detail'),
     path('posts/create/', views.PostCreateView.as_view(),
          name='create_post'),
@@ -16,15 +19,29 @@ urlpatterns = [
          name='delete_post'),
 
     path('category/<slug:category_slug>/',
-         views.CategotyPostListView.as_view(),
+         page_view(views.CategotyPostListView),
          name='category_posts'),
+    path('category/<slug:category_slug>/feed/<slug:feed_format>/',
+         feeds.CategoryFeedView.as_view(),
+         name='category_feed'),
 
-    path('profile/<slug:username>/', views.ProfileListView.as_view(),
+    path('sitemap.xml', sitemaps.sitemap_index, name='sitemap'),
+    path('sitemap-<slug:section>-<int:shard>.xml', sitemaps.sitemap_shard,
+         name='sitemap_shard'),
+
+    path('search/', views.PostSearchView.as_view(), name='search'),
+
+    path('profile/<slug:username>/', page_view(views.ProfileListView),
          name='profile'),
+    path('profile/<slug:username>/feed/<slug:feed_format>/',
+         feeds.AuthorFeedView.as_view(),
+         name='profile_feed'),
     path('edit_profile/',
          views.ProfileUpdateView.as_view(),
          name='edit_profile'),
 
+    path('posts/<int:post_id>/comments/', views.post_comments,
+         name='comments'),
     path('posts/<int:post_id>/comment/', views.post_comment,
          name='add_comment'),
     path('posts/<int:post_id>/edit_comment/<int:comment_id>/',
@@ -33,4 +50,19 @@ urlpatterns = [
     path('posts/<int:post_id>/delete_comment/<int:comment_id>/',
          views.post_comment_delete,
          name='delete_comment'),
+
+    path('api/posts/', api.PostListApiView.as_view(), name='api_posts'),
+    path('api/posts/<int:post_id>/', api.PostApiView.as_view(),
+         name='api_post'),
+    path('api/posts/<int:post_id>/comments/',
+         api.CommentListApiView.as_view(),
+         name='api_comments'),
+    path('api/category/<slug:category_slug>/posts/',
+         api.CategoryPostsApiView.as_view(),
+         name='api_category_posts'),
+    path('api/profile/<slug:username>/posts/',
+         api.ProfilePostsApiView.as_view(),
+         name='api_profile_posts'),
+
+    path('debug/queries/', views.query_log, name='query_log'),
 ]
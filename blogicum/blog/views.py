@@ -6,19 +6,227 @@ from django.views.generic import (
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
-from django.http import Http404
-from django.utils import timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import InvalidPage
+from django.db import transaction
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 
 from .models import Post, Category, Comment
 from .forms import PostForm, UpdateUserForm, CommentForm
-from .querysets import filter_profile_post_list, add_filter_post_list
-from .constants import QUANTITY_ON_PAGINATE
+from .querysets import (
+    add_filter_post_list, filter_profile_post_list, get_feed_queryset,
+    get_publish_now, get_scheduled_queryset, get_visible_post_queryset
+)
+from .constants import COMMENTS_ON_PAGE, QUANTITY_ON_PAGINATE
+from .cards import attach_card_html
+from .paginators import CountedPaginator, CursorPaginator
+from .counters import FEED_COUNTER, author_counter, category_counter
+from .instrumentation import RECENT
+from .search import search_posts
+from .db import retry_on_locked
+from .routers import read_stale_replica
+from .caching import (
+    CATEGORIES_SCOPE, FEED_SCOPE, GLOBAL_SCOPE, LOCATIONS_SCOPE, author_scope,
+    category_scope, digest, get_scope_stamps, location_scope, make_etag,
+    post_scope
+)
 
 
 User = get_user_model()
 
 
-class ProfileListView(ListView):
+class CursorPaginationMixin:
+    """
+    Курсорная пагинация ленты: `?after=` / `?before=` без COUNT(*).
+
+    Явный `?page=N` переключает представление в классический режим
+    постраничной навигации ради обратной совместимости ссылок.
+    """
+
+    cursor_ordering = ('-pub_date', '-id')
+
+    def get_pagination_mode(self):
+        params = self.request.GET
+        if 'after' in params or 'before' in params:
+            return 'cursor'
+        if self.page_kwarg in params or self.page_kwarg in self.kwargs:
+            return 'page'
+        return settings.BLOG_PAGINATION_MODE
+
+    def get_post_counter(self):
+        """Счётчик PostCounter страницы и отложенные посты для вычета."""
+        return None, None
+
+    def get_paginator(self, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True, **kwargs):
+        counter, scheduled = self.get_post_counter()
+        if counter is None:
+            return super().get_paginator(
+                queryset, per_page, orphans, allow_empty_first_page,
+                **kwargs)
+        return CountedPaginator(
+            queryset, per_page, counter, scheduled, orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page, **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.get_pagination_mode() != 'cursor':
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size, self.cursor_ordering)
+        try:
+            page = paginator.page(after=self.request.GET.get('after'),
+                                  before=self.request.GET.get('before'))
+        except InvalidPage as error:
+            raise Http404(str(error))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+class ConditionalGetMixin:
+    """
+    Ответ 304 на If-None-Match / If-Modified-Since без основного запроса
+    и рендеринга.
+
+    Свежесть страницы определяют отметки её областей кэша (их обновляют
+    сигналы моделей) и даты из `get_freshness_dates()`: для лент это
+    самая поздняя дата публикации видимых постов, по ней видно наступление
+    отложенных публикаций, о котором сигналы не сообщают.
+    """
+
+    freshness_scopes = ()
+    # Страницы показывают меню и ссылки текущего пользователя.
+    vary_on_user = True
+
+    def get_freshness_scopes(self):
+        return (GLOBAL_SCOPE, *self.freshness_scopes)
+
+    def get_freshness_viewer(self):
+        """Чем различаются зрители, которым queryset отдаёт разные посты."""
+        return None
+
+    def get_freshness_dates(self, scopes, stamps):
+        """
+        Самая поздняя из уже наступивших дат публикации в ленте.
+
+        Отложенные посты, которые видит автор, в расчёт не идут: иначе
+        Last-Modified оказался бы в будущем и новые посты не меняли бы
+        ответ на If-Modified-Since. Лента фильтруется по «сейчас»,
+        округлённому до BLOG_PUBLISH_TIME_BUCKET, поэтому результат
+        зависит только от отметок областей, текущего шага
+        и `get_freshness_viewer()` и кэшируется по ним.
+        """
+        now = get_publish_now()
+        key = 'newest:' + digest(type(self).__name__, *scopes, *stamps,
+                                 now.timestamp(),
+                                 self.get_freshness_viewer())
+        cached = cache.get(key)
+        if cached is None:
+            cached = (self.get_queryset()
+                      .filter(pub_date__lte=now)
+                      .order_by('-pub_date')
+                      .values_list('pub_date', flat=True)
+                      .first(),)
+            if not read_stale_replica(max(stamps)):
+                cache.set(key, cached, settings.BLOG_PAGE_CACHE_TIMEOUT)
+        return list(cached)
+
+    def get_validators(self):
+        scopes = self.get_freshness_scopes()
+        stamps = get_scope_stamps(*scopes)
+        dates = self.get_freshness_dates(scopes, stamps)
+        user = self.request.user
+        if self.vary_on_user:
+            # Шапка показывает имя вошедшего пользователя, а формы страницы —
+            # CSRF-токен: после нового входа старая копия формы не отправится.
+            user = (user.pk, user.get_username(), user.is_authenticated
+                    and self.request.META.get('CSRF_COOKIE'))
+        else:
+            user = None
+        etag = make_etag(self.request.get_full_path(), user, *stamps, *dates)
+        changed_at = max(
+            [*stamps, *(date.timestamp() for date in dates if date)])
+        return etag, changed_at
+
+    def check_not_modified(self, request):
+        """Вычисляет валидаторы страницы; ответ 304 или None."""
+        self.etag, self.changed_at = self.get_validators()
+        self.last_modified = int(self.changed_at)
+        return get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified)
+
+    def add_validators(self, response):
+        """Ответ с отстающей реплики валидаторов не получает."""
+        if (self.etag and response.status_code in (200, 304)
+                and not read_stale_replica(self.changed_at)):
+            response.headers.setdefault('ETag', self.etag)
+            response.headers.setdefault(
+                'Last-Modified', http_date(self.last_modified))
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        response = self.check_not_modified(request)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        return self.add_validators(response)
+
+
+class PostScopesMixin:
+    """
+    Свежесть страницы одного поста: отметки поста, его категории и места,
+    чьи названия и статусы на ней выводятся.
+
+    Категорию и место меняет только правка поста, поэтому их области
+    запоминаются по отметке поста. Пока они не известны, 304 не отдаётся,
+    а валидаторы считаются по загруженному посту (`set_related_scopes`).
+    """
+
+    related_key = related_scopes = None
+
+    def get_freshness_scopes(self):
+        return (GLOBAL_SCOPE, post_scope(self.kwargs['post_id']),
+                *self.related_scopes)
+
+    def check_not_modified(self, request):
+        post_id = self.kwargs['post_id']
+        stamp, = get_scope_stamps(post_scope(post_id))
+        self.related_key = 'post_related:' + digest(post_id, stamp)
+        self.related_scopes = cache.get(self.related_key)
+        if self.related_scopes is None:
+            self.etag = None
+            return None
+        return super().check_not_modified(request)
+
+    def set_related_scopes(self, category_slug, location_id):
+        """Области категории и места загруженного поста и валидаторы."""
+        if self.related_scopes is not None:
+            return
+        self.related_scopes = tuple(filter(None, (
+            category_slug and category_scope(category_slug),
+            location_id and location_scope(location_id),
+        )))
+        self.etag, self.changed_at = self.get_validators()
+        self.last_modified = int(self.changed_at)
+        if not read_stale_replica(self.changed_at):
+            cache.set(self.related_key, self.related_scopes,
+                      settings.BLOG_PAGE_CACHE_TIMEOUT)
+
+
+class PostCardsMixin:
+    """Подставляет в страницу ленты закэшированные карточки постов."""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context.get('page_obj')
+        if page is not None:
+            page.object_list = attach_card_html(page.object_list)
+        return context
+
+
+class ProfileListView(ConditionalGetMixin, PostCardsMixin,
+                      CursorPaginationMixin, ListView):
     model = Post
     template_name = 'blog/profile.html'
     paginate_by = QUANTITY_ON_PAGINATE
@@ -32,6 +240,13 @@ class ProfileListView(ListView):
         queryset = filter_profile_post_list(self.author.posts)
         return queryset
 
+    def get_freshness_scopes(self):
+        return (GLOBAL_SCOPE, author_scope(self.kwargs['username']),
+                CATEGORIES_SCOPE, LOCATIONS_SCOPE)
+
+    def get_post_counter(self):
+        return author_counter(self.author.pk), None
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['profile'] = self.author
@@ -46,43 +261,62 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
     def get_object(self, queryset=None):
         return self.request.user
 
+    @retry_on_locked
+    def form_valid(self, form):
+        return super().form_valid(form)
+
 
-class PostListView(ListView):
+class PostListView(ConditionalGetMixin, PostCardsMixin,
+                   CursorPaginationMixin, ListView):
     model = Post
-    queryset = add_filter_post_list(filter_profile_post_list(Post.objects))
     template_name = 'blog/index.html'
     paginate_by = QUANTITY_ON_PAGINATE
+    freshness_scopes = (FEED_SCOPE,)
+
+    def get_queryset(self):
+        return get_feed_queryset()
 
+    def get_post_counter(self):
+        return FEED_COUNTER, get_scheduled_queryset()
 
-class PostDetailView(DetailView):
+
+class PostDetailView(PostScopesMixin, ConditionalGetMixin, DetailView):
     model = Post
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'post_id'
     context_object_name = 'post'
 
+    def get_queryset(self):
+        return get_visible_post_queryset(self.request.user)
+
+    def get_object(self, queryset=None):
+        post = super().get_object(queryset)
+        self.set_related_scopes(post.category and post.category.slug,
+                                post.location_id)
+        return post
+
+    def get_freshness_dates(self, scopes, stamps):
+        """
+        Правки поста и его комментариев обновляют отметку `post_scope`,
+        а со временем пост может только появиться (до этого страница
+        отвечает 404 без ETag), так что отметок достаточно.
+        """
+        return []
+
+    def get_comments_page(self):
+        return get_comments_page(self.object)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['comments'] = (
-            self.object.comments.select_related('author')
-        )
+        page = self.get_comments_page()
+        context['comments'] = page.object_list
+        context['comments_page'] = page
         context['form'] = CommentForm()
         return context
 
-    def dispatch(self, request, *args, **kwargs):
-        """
-        Проверяем, что пост, снятый с публикации, в неопубликованной
-        категории или отложенный по времени видит только его автор.
-        """
-        instance = get_object_or_404(Post, pk=self.kwargs['post_id'])
-        if ((instance.is_published is False
-             or instance.category.is_published is False
-             or instance.pub_date > timezone.now())
-                and instance.author != self.request.user):
-            raise Http404
-        return super().dispatch(request, *args, **kwargs)
 
-
-class CategotyPostListView(ListView):
+class CategotyPostListView(ConditionalGetMixin, PostCardsMixin,
+                           CursorPaginationMixin, ListView):
     model = Post
     template_name = 'blog/category.html'
     paginate_by = QUANTITY_ON_PAGINATE
@@ -101,21 +335,50 @@ class CategotyPostListView(ListView):
             filter_profile_post_list(self.category.posts))
         return queryset
 
+    def get_freshness_scopes(self):
+        return (GLOBAL_SCOPE, category_scope(self.kwargs['category_slug']),
+                LOCATIONS_SCOPE)
+
+    def get_post_counter(self):
+        return (category_counter(self.category.pk),
+                get_scheduled_queryset().filter(category=self.category))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        self.set_category(self.kwargs['category_slug'])
         context['category'] = self.category
         return context
 
 
+class PostSearchView(CursorPaginationMixin, ListView):
+    """Полнотекстовый поиск по видимым постам, лучшие совпадения первыми."""
+
+    template_name = 'blog/search.html'
+    paginate_by = QUANTITY_ON_PAGINATE
+    cursor_ordering = ('rank', 'id')
+
+    def get_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_queryset(self):
+        """Лучшие совпадения первыми и при курсорной, и при `?page=N`."""
+        return search_posts(self.get_query()).order_by(*self.cursor_ordering)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.get_query()
+        return context
+
+
 class PostCreateView(LoginRequiredMixin, CreateView):
     model = Post
     form_class = PostForm
     template_name = 'blog/create.html'
 
+    @retry_on_locked
     def form_valid(self, form):
         form.instance.author = self.request.user
-        return super().form_valid(form)
+        with transaction.atomic():
+            return super().form_valid(form)
 
     def get_success_url(self):
         return reverse('blog:profile',
@@ -136,6 +399,11 @@ class PostUpdateView(LoginRequiredMixin, OnlyAuthorMixin, UpdateView):
     template_name = 'blog/create.html'
     pk_url_kwarg = 'post_id'
 
+    @retry_on_locked
+    def form_valid(self, form):
+        with transaction.atomic():
+            return super().form_valid(form)
+
     def get_success_url(self):
         return reverse('blog:post_detail',
                        kwargs={'post_id': self.kwargs[self.pk_url_kwarg]})
@@ -146,12 +414,39 @@ class PostDeleteView(LoginRequiredMixin, OnlyAuthorMixin, DeleteView):
     template_name = 'blog/create.html'
     pk_url_kwarg = 'post_id'
 
+    @retry_on_locked
+    def delete(self, request, *args, **kwargs):
+        return super().delete(request, *args, **kwargs)
+
     def get_success_url(self):
         return reverse('blog:profile',
                        kwargs={'username': self.request.user.username})
 
 
+def get_comments_page(post, after=None):
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        COMMENTS_ON_PAGE,
+        ordering=('created_at', 'id'),
+    )
+    return paginator.page(after=after)
+
+
+def post_comments(request, post_id):
+    """HTML-фрагмент со следующей страницей комментариев к посту."""
+    post = get_object_or_404(get_visible_post_queryset(request.user),
+                             pk=post_id)
+    try:
+        page = get_comments_page(post, after=request.GET.get('after'))
+    except InvalidPage as error:
+        raise Http404(str(error))
+    context = {'post': post, 'comments': page.object_list,
+               'comments_page': page}
+    return render(request, 'includes/comment_list.html', context)
+
+
 @login_required
+@retry_on_locked
 def post_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(data=request.POST)
@@ -159,11 +454,13 @@ def post_comment(request, post_id):
         comment = form.save(commit=False)
         comment.post = post
         comment.author = request.user
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('blog:post_detail', post_id=post_id)
 
 
 @login_required
+@retry_on_locked
 def post_comment_edit(request, post_id, comment_id):
     instance = get_object_or_404(Comment, post__id=post_id, id=comment_id)
     if instance.author != request.user:
@@ -177,6 +474,7 @@ def post_comment_edit(request, post_id, comment_id):
 
 
 @login_required
+@retry_on_locked
 def post_comment_delete(request, post_id, comment_id):
     instance = get_object_or_404(Comment, post__id=post_id, id=comment_id)
     if instance.author != request.user:
@@ -186,3 +484,24 @@ def post_comment_delete(request, post_id, comment_id):
         instance.delete()
         return redirect('blog:post_detail', post_id=post_id)
     return render(request, 'blog/comment.html', context)
+
+
+def query_log(request):
+    """
+    Последние замеры SQL (только при DEBUG и только для персонала).
+
+    Фильтры: `?view=blog:index`, `?min_queries=N`.
+    """
+    if not (settings.DEBUG and request.user.is_staff):
+        raise Http404
+    entries = list(reversed(RECENT))
+    view = request.GET.get('view')
+    if view:
+        entries = [entry for entry in entries if entry['view'] == view]
+    try:
+        min_queries = int(request.GET.get('min_queries', 0))
+    except ValueError:
+        min_queries = 0
+    entries = [entry for entry in entries if entry['queries'] >= min_queries]
+    return JsonResponse({'results': entries},
+                        json_dumps_params={'ensure_ascii': False})
@@ -0,0 +1,38 @@
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.template import engines
+
+logger = logging.getLogger('blog.warmup')
+
+
+def warm_templates(using='django'):
+    """
+    Компилирует все шаблоны из DIRS движка `using`.
+
+    Кэширующий загрузчик сохраняет скомпилированные шаблоны, и первый
+    запрос к странице не разбирает base.html и include с диска.
+    Возвращает имена скомпилированных шаблонов.
+    """
+    backend = engines[using]
+    names = []
+    for directory in backend.engine.dirs:
+        root = Path(directory)
+        for path in sorted(root.rglob('*')):
+            if path.is_file():
+                name = path.relative_to(root).as_posix()
+                backend.get_template(name)
+                names.append(name)
+    return names
+
+
+def warm_up():
+    """Прогрев процесса перед приёмом запросов по BLOG_TEMPLATE_WARMUP."""
+    if not settings.BLOG_TEMPLATE_WARMUP:
+        return
+    started = time.perf_counter()
+    names = warm_templates()
+    logger.info('Скомпилировано шаблонов: %s за %.1f мс', len(names),
+                (time.perf_counter() - started) * 1000)
@@ -12,5 +12,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+os.environ.setdefault('BLOG_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
+
+# Шаблоны компилируются до первого запроса; приложения уже загружены.
+from blog.warmup import warm_up  # noqa: E402
+
+warm_up()
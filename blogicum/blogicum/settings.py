@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -24,11 +25,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.QueryInstrumentationMiddleware',
+    'blog.middleware.ReplicaRoutingMiddleware',
+    'blog.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -37,12 +42,28 @@ ROOT_URLCONF = 'blogicum.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
 
+# Кэширующий загрузчик задан явно: иначе при DEBUG = True шаблоны, в том
+# числе каждый include в цикле карточек, разбираются с диска при каждом
+# рендере. BLOG_TEMPLATE_CACHE=0 в окружении — для правки шаблонов.
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if os.environ.get('BLOG_TEMPLATE_CACHE', '1') == '1':
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
+# Компилировать все шаблоны TEMPLATES_DIR при запуске wsgi.py и asgi.py,
+# до первого запроса (см. blog.warmup).
+BLOG_TEMPLATE_WARMUP = os.environ.get('BLOG_TEMPLATE_WARMUP', '1') == '1'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -55,13 +76,103 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
+# Хранилище сессий по переменной окружения BLOG_SESSION_MODE: 'cache' —
+# чтение из кэша с записью в базу, 'cookies' — подписанная cookie без
+# базы (выход не отзывает скопированную cookie), 'db' — только база.
+BLOG_SESSION_ENGINES = {
+    'cache': 'django.contrib.sessions.backends.cached_db',
+    'cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'db': 'django.contrib.sessions.backends.db',
+}
+BLOG_SESSION_MODE = os.environ.get('BLOG_SESSION_MODE', 'cache')
+SESSION_ENGINE = BLOG_SESSION_ENGINES[BLOG_SESSION_MODE]
+# Выход и смена пароля должны завершать сессию во всех процессах.
+SESSION_CACHE_ALIAS = 'shared'
+
+# Время жизни пользователя сессии в кэше, секунды (см. blog.auth).
+BLOG_USER_CACHE_TIMEOUT = 60 * 15
+
+# Отметки областей кэша (см. blog.caching) хранятся в кэше 'shared', общем
+# для всех процессов сервера: иначе сброс области в одном процессе не
+# доходит до остальных. По умолчанию это файлы на диске — общие для
+# процессов одной машины, как и база SQLite. На нескольких машинах
+# BLOG_SHARED_CACHE_BACKEND и BLOG_SHARED_CACHE_LOCATION задают Memcached
+# или кэш в базе данных. Страницы, карточки и документы лент кэшируются
+# в памяти процесса: их ключи содержат общие отметки.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blogicum',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        # Каталог проекта, а не общая /tmp: файлы кэша распаковываются
+        # pickle, и подложить их не должен никто, кроме владельца.
+        'LOCATION': os.environ.get('BLOG_SHARED_CACHE_LOCATION',
+                                   str(BASE_DIR / 'shared_cache')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+if 'BLOG_SHARED_CACHE_BACKEND' in os.environ:
+    CACHES['shared'] = {
+        'BACKEND': os.environ['BLOG_SHARED_CACHE_BACKEND'],
+        'LOCATION': os.environ.get('BLOG_SHARED_CACHE_LOCATION', ''),
+    }
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение живёт между запросами: не открывается файл и не
+        # теряется кэш страниц SQLite.
+        'CONN_MAX_AGE': 60 * 10,
+    }
+}
+
+# Реплики только для чтения: пути к копиям базы через запятую в переменной
+# окружения BLOG_REPLICA_PATHS. Копии обновляет manage.py sync_replica.
+BLOG_REPLICAS = []
+for index, path in enumerate(
+        filter(None, os.environ.get('BLOG_REPLICA_PATHS', '').split(','))):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
     }
+    BLOG_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+
+# Реплики читаются только в запросах к этим пространствам имён URL и только
+# для моделей этих приложений: сессии, пользователи и админка всегда
+# читаются с основной базы.
+BLOG_REPLICA_NAMESPACES = ('blog',)
+BLOG_REPLICA_APPS = ('blog',)
+
+# На сколько секунд запрос с записью закрепляет клиента за основной базой.
+BLOG_REPLICA_PIN_SECONDS = 15
+BLOG_REPLICA_PIN_COOKIE = 'blog_primary'
+
+# PRAGMA каждого нового соединения SQLite (см. blog.db).
+BLOG_SQLITE_PRAGMAS = {
+    # Миллисекунды ожидания чужой блокировки до ошибки «database is locked».
+    'busy_timeout': 5000,
+    # Читатели не ждут писателя и наоборот.
+    'journal_mode': 'WAL',
+    # В режиме WAL fsync только на контрольных точках.
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — в КиБ: 64 МиБ кэша страниц на соединение.
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
 }
 
+# Повторы записи, на которую SQLite ответил «database is locked»:
+# число попыток и первая пауза в секундах (далее вдвое больше).
+BLOG_DB_RETRY_ATTEMPTS = 5
+BLOG_DB_RETRY_DELAY = 0.05
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -104,3 +215,53 @@ MEDIA_ROOT = BASE_DIR / 'media'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+
+# 'cursor' — keyset-пагинация лент без COUNT(*), 'page' — классическая ?page=N.
+BLOG_PAGINATION_MODE = 'cursor'
+
+# Шаг (в секундах), до которого округляется «сейчас» в фильтре ленты.
+BLOG_PUBLISH_TIME_BUCKET = 60
+
+# Время жизни отрендеренных карточек постов в кэше, секунды.
+BLOG_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Время жизни страниц ленты, категорий и профилей для анонимов, секунды.
+# Правки сбрасывают кэш сигналами; таймаут ограничивает задержку появления
+# отложенных публикаций, о которых сигналы не сообщают.
+BLOG_PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Время жизни готовых документов RSS/Atom, секунды. Правки постов меняют
+# ключ документа сразу, таймаут лишь освобождает память.
+BLOG_FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Время жизни файлов sitemap и их описаний, секунды. Правки меняют ключ
+# только своего файла; отложенные посты пересчитываются по времени выхода.
+BLOG_SITEMAP_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Бюджеты manage.py bench_views: маршрут (или '*') -> предельные метрики.
+BLOG_BENCHMARK_BUDGETS = {
+    '*': {'p95_ms': 500, 'queries': 10},
+    'blog:index?page=last': {'p95_ms': 1000, 'queries': 10},
+}
+
+# Доля HTTP-запросов, SQL которых замеряет QueryInstrumentationMiddleware.
+BLOG_SQL_SAMPLE_RATE = 1.0 if DEBUG else 0.05
+
+# Сколько раз один отпечаток SQL может повториться за запрос, прежде чем
+# попасть в лог blog.sql как вероятный N+1.
+BLOG_SQL_REPEAT_THRESHOLD = 5
+
+# Сколько последних замеров держит процесс для /debug/queries/.
+BLOG_SQL_LOG_SIZE = 200
+
+# Заголовок Server-Timing на всех ответах; персонал переключает его
+# для отдельного запроса параметром ?server_timing=1 / 0.
+BLOG_SERVER_TIMING = DEBUG
+
+# Async-версии ленты, категории, профиля и страницы поста. asgi.py включает
+# их по умолчанию; под WSGI каждая из них заняла бы отдельный цикл событий.
+BLOG_ASYNC_VIEWS = os.environ.get('BLOG_ASYNC_VIEWS', '0') == '1'
+
+# Потоков пула, в котором async-представления работают с базой. Пул
+# ограничен, чтобы медленные чтения SQLite не занимали все потоки сервера.
+BLOG_ASYNC_DB_WORKERS = 4
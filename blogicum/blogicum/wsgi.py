@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
 application = get_wsgi_application()
+
+# Шаблоны компилируются до первого запроса; приложения уже загружены.
+from blog.warmup import warm_up  # noqa: E402
+
+warm_up()
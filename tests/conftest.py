@@ -1,6 +1,7 @@
 import os
 import re
 import time
+from datetime import timedelta
 from http import HTTPStatus
 from inspect import getsource
 from pathlib import Path
@@ -19,11 +20,14 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import caches
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
 from django.test import override_settings
 from django.test.client import Client
+from django.utils import timezone
 from mixer.backend.django import mixer as _mixer
 
 N_PER_FIXTURE = 3
@@ -41,6 +45,22 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True, scope="session")
+def shared_cache_location(tmp_path_factory):
+    """Общий кэш тестов не смешивается с кэшем запущенного сервера."""
+    location = tmp_path_factory.mktemp("shared_cache")
+    shared = {**settings.CACHES["shared"], "LOCATION": str(location)}
+    with override_settings(CACHES={**settings.CACHES, "shared": shared}):
+        yield location
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(shared_cache_location):
+    for cache in caches.all():
+        cache.clear()
+    yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -133,6 +153,18 @@ def another_user_client(another_user):
     return client
 
 
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    """Фабрика видимых постов; любое поле можно переопределить."""
+    def make(**kwargs):
+        kwargs.setdefault("author", user)
+        kwargs.setdefault("is_published", True)
+        kwargs.setdefault("category", published_category)
+        kwargs.setdefault("pub_date", timezone.now() - timedelta(days=1))
+        return mixer.blend("blog.Post", **kwargs)
+    return make
+
+
 def get_post_list_context_key(
         user_client, page_url, page_load_err_msg, key_missing_msg
 ):
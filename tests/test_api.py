@@ -0,0 +1,123 @@
+import time
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import parse_http_date
+
+pytestmark = [pytest.mark.django_db]
+
+
+def ids(response):
+    return [item["id"] for item in response.json()["results"]]
+
+
+def test_feed_uses_visibility_rules(client, make_post, mixer):
+    visible = make_post()
+    make_post(is_published=False)
+    make_post(pub_date=timezone.now() + timedelta(days=1))
+    make_post(category=mixer.blend("blog.Category", is_published=False))
+    response = client.get("/api/posts/")
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"] == "application/json"
+    assert ids(response) == [visible.id], (
+        "Убедитесь, что API ленты отдаёт только видимые публикации."
+    )
+    item = response.json()["results"][0]
+    assert item["author"] == visible.author.username
+    assert item["category"] == visible.category.slug
+
+
+def test_sparse_fields_select_only_requested_columns(client, make_post):
+    post = make_post()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/api/posts/", {"fields": "id,title"})
+    assert response.json()["results"] == [{"id": post.id,
+                                           "title": post.title}]
+    sql = " ".join(query["sql"] for query in queries.captured_queries
+                   if '"blog_post"."title"' in query["sql"])
+    assert '"blog_post"."text"' not in sql, (
+        "Убедитесь, что `?fields=` ограничивает колонки в SELECT."
+    )
+    assert "COUNT(" not in sql.upper()
+
+
+def test_unknown_field_and_bad_limit(client):
+    for params in ({"fields": "id,password"}, {"limit": "0"},
+                   {"limit": "x"}):
+        response = client.get("/api/posts/", params)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, params
+        assert "error" in response.json()
+
+
+def test_cursor_pagination(client, make_post):
+    posts = [make_post(pub_date=timezone.now() - timedelta(hours=index + 1))
+             for index in range(5)]
+    seen, url = [], "/api/posts/?limit=2&fields=id"
+    while url:
+        data = client.get(url).json()
+        seen.extend(item["id"] for item in data["results"])
+        url = data["next"]
+    assert seen == [post.id for post in posts], (
+        "Убедитесь, что курсоры `next` обходят ленту без пропусков."
+    )
+    back = client.get(client.get("/api/posts/?limit=2").json()["next"])
+    previous = client.get(back.json()["previous"])
+    assert ids(previous) == [posts[0].id, posts[1].id]
+
+
+def test_category_and_profile(client, make_post, mixer, user,
+                              published_category):
+    own = make_post()
+    hidden = make_post(is_published=False)
+    make_post(category=mixer.blend("blog.Category", is_published=True))
+    response = client.get(f"/api/category/{published_category.slug}/posts/")
+    assert ids(response) == [own.id]
+    url = f"/api/profile/{user.username}/posts/"
+    assert hidden.id not in ids(client.get(url)), (
+        "Убедитесь, что неопубликованные посты автора скрыты от других."
+    )
+    client.force_login(user)
+    assert hidden.id in ids(client.get(url))
+    hidden_category = mixer.blend("blog.Category", is_published=False)
+    response = client.get(f"/api/category/{hidden_category.slug}/posts/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_profile_dates_of_hidden_posts_stay_private(
+        client, user_client, make_post, user):
+    make_post()
+    make_post(pub_date=timezone.now() + timedelta(days=30))
+    url = f"/api/profile/{user.username}/posts/"
+    user_client.get(url)
+    anonymous = client.get(url)
+    assert parse_http_date(anonymous["Last-Modified"]) <= time.time(), (
+        "Убедитесь, что дата отложенного поста автора не попадает"
+        " в Last-Modified ответа другим пользователям."
+    )
+
+
+def test_detail_and_comments(client, make_post, mixer):
+    post = make_post()
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    data = client.get(f"/api/posts/{post.id}/").json()
+    assert data["id"] == post.id and data["text"] == post.text
+    response = client.get(f"/api/posts/{post.id}/comments/", {"limit": 2})
+    data = response.json()
+    assert [item["id"] for item in data["results"]] == [
+        comment.id for comment in comments[:2]]
+    assert ids(client.get(data["next"])) == [comments[2].id]
+    hidden = make_post(is_published=False)
+    for url in (f"/api/posts/{hidden.id}/",
+                f"/api/posts/{hidden.id}/comments/"):
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_conditional_get(client, make_post):
+    make_post()
+    response = client.get("/api/posts/")
+    repeated = client.get("/api/posts/", HTTP_IF_NONE_MATCH=response["ETag"])
+    assert repeated.status_code == HTTPStatus.NOT_MODIFIED
@@ -0,0 +1,131 @@
+import asyncio
+import importlib
+import threading
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.urls import clear_url_caches
+from django.utils import timezone
+
+from blog import async_views, instrumentation
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+def reload_urls():
+    import blog.urls
+    import blogicum.urls
+    importlib.reload(blog.urls)
+    importlib.reload(blogicum.urls)
+    clear_url_caches()
+
+
+@pytest.fixture
+def switch_pages(settings):
+    def switch(enabled):
+        settings.BLOG_ASYNC_VIEWS = enabled
+        reload_urls()
+    yield switch
+    settings.BLOG_ASYNC_VIEWS = False
+    reload_urls()
+
+
+@pytest.fixture
+def page_posts(mixer, user, published_category):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1))
+    mixer.cycle(2).blend("blog.Comment", post=posts[0], author=user)
+    return posts
+
+
+@pytest.fixture
+def page_urls(page_posts, user, published_category):
+    return ["/", f"/category/{published_category.slug}/",
+            f"/profile/{user.username}/", f"/posts/{page_posts[0].id}/"]
+
+
+def test_pages_resolve_to_async_views(client, switch_pages, page_urls):
+    switch_pages(True)
+    for url in page_urls:
+        func = client.get(url).resolver_match.func
+        assert asyncio.iscoroutinefunction(func), (
+            "Убедитесь, что при BLOG_ASYNC_VIEWS страницы ленты, категории,"
+            " профиля и поста асинхронные."
+        )
+        assert func.view_class in async_views.ASYNC_PAGES.values()
+
+
+def test_async_pages_match_sync_pages(client, switch_pages, page_urls):
+    expected = [client.get(url) for url in page_urls]
+    switch_pages(True)
+    for url, sync_response in zip(page_urls, expected):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, url
+        assert response.content == sync_response.content, (
+            f"Убедитесь, что async-версия {url} совпадает с обычной."
+        )
+        assert response["ETag"] == sync_response["ETag"]
+
+
+def test_async_not_found_and_not_modified(client, switch_pages, page_urls,
+                                          mixer, user):
+    switch_pages(True)
+    hidden = mixer.blend("blog.Post", author=user, is_published=False)
+    for url in ("/category/missing/", "/profile/missing/",
+                f"/posts/{hidden.id}/"):
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND, url
+    for url in page_urls:
+        etag = client.get(url)["ETag"]
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, url
+
+
+def test_lookups_run_concurrently_in_db_pool(client, switch_pages,
+                                             page_urls, monkeypatch):
+    switch_pages(True)
+    threads = set()
+    calls = []
+    original = async_views.run_db
+
+    async def tracking_run_db(func, *args, **kwargs):
+        calls.append(getattr(func, "__name__", func))
+
+        def wrapped(*args, **kwargs):
+            threads.add(threading.current_thread().name)
+            return func(*args, **kwargs)
+        return await original(wrapped, *args, **kwargs)
+
+    monkeypatch.setattr(async_views, "run_db", tracking_run_db)
+    client.get(page_urls[3])
+    assert {"load_post", "load_comments"} <= set(calls), (
+        "Убедитесь, что пост и комментарии читаются отдельными задачами."
+    )
+    assert threads and all(name.startswith("blog-db") for name in threads), (
+        "Убедитесь, что работа с базой идёт в выделенном пуле потоков."
+    )
+    assert async_views.get_db_executor()._max_workers == (
+        async_views.settings.BLOG_ASYNC_DB_WORKERS)
+
+
+def test_asgi_requests_are_instrumented(async_client, switch_pages,
+                                        page_urls, settings):
+    switch_pages(True)
+    settings.BLOG_SERVER_TIMING = True
+    settings.BLOG_SQL_SAMPLE_RATE = 1.0
+    instrumentation.RECENT.clear()
+
+    async def fetch():
+        return await async_client.get(page_urls[1])
+
+    response = async_to_sync(fetch)()
+    assert response.status_code == HTTPStatus.OK
+    assert "db;dur=" in response["Server-Timing"]
+    assert instrumentation.RECENT[-1]["queries"] > 0, (
+        "Убедитесь, что SQL из пула потоков попадает в замеры запроса."
+    )
+    assert connection.execute_wrappers.count(
+        instrumentation._dispatch_query) <= 1
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from blog.benchmark import (
+    check_budgets, dump_report, page_urls, run_benchmark,
+    run_first_requests, run_load
+)
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def report():
+    return run_benchmark([20, 40], repeat=2)
+
+
+def test_benchmark_covers_all_routes(report, tmp_path):
+    assert set(report["results"]) == {"20", "40"}
+    routes = report["results"]["40"]
+    for name in ("blog:index", "blog:post_detail", "blog:category_posts",
+                 "blog:profile", "blog:comments", "pages:about",
+                 "pages:rules"):
+        metrics = routes[name]
+        assert metrics["status"] == 200, name
+        assert metrics["p95_ms"] >= metrics["p50_ms"] > 0
+        assert metrics["response_bytes"] > 0
+    path = tmp_path / "bench.json"
+    dump_report(report, path)
+    assert json.loads(path.read_text(encoding="utf-8")) == report
+
+
+def test_budgets_report_violations(report):
+    assert check_budgets(report, {"*": {"queries": 100}}) == []
+    violations = check_budgets(report, {"blog:index": {"queries": 0}})
+    assert len(violations) == 2
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("mode", ["wsgi", "asgi"])
+def test_deployment_load(mode, mixer, user, published_category):
+    mixer.blend("blog.Post", author=user, category=published_category,
+                is_published=True)
+    urls = page_urls()
+    assert len(urls) == 4
+    result = run_load(mode, urls, requests=8, concurrency=4)
+    assert result["statuses"] == {"200": 8}, (
+        "Убедитесь, что нагрузочный прогон обращается к приложению"
+        f" {mode} и получает ответы 200."
+    )
+    assert result["rps"] > 0 and result["p95_ms"] >= result["p50_ms"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_first_request_timings(mixer, user, published_category):
+    mixer.blend("blog.Post", author=user, category=published_category,
+                is_published=True)
+    urls = page_urls()
+    result = run_first_requests(urls)
+    assert result["statuses"] == {"200": 8}
+    assert set(result["first_ms"]) == set(result["repeat_ms"]) == set(urls)
+    assert result["startup_ms"] >= 0
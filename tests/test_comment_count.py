@@ -0,0 +1,55 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def stored_count(post):
+    return Post.objects.values_list("comment_count", flat=True).get(
+        pk=post.pk)
+
+
+def test_comment_count_follows_views(
+        user_client, user, post_with_published_location):
+    post = post_with_published_location
+    for _ in range(2):
+        user_client.post(
+            f"/posts/{post.id}/comment/", data={"text": "Комментарий"})
+    assert stored_count(post) == 2, (
+        "Убедитесь, что добавление комментария увеличивает счётчик"
+        " `comment_count` публикации."
+    )
+    comment = Comment.objects.filter(post=post).first()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}/")
+    assert stored_count(post) == 1, (
+        "Убедитесь, что удаление комментария уменьшает счётчик"
+        " `comment_count` публикации."
+    )
+
+
+def test_comment_count_after_bulk_delete(
+        mixer, user, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(5).blend("blog.Comment", post=post, author=user)
+    assert stored_count(post) == 5
+    Comment.objects.filter(
+        pk__in=Comment.objects.filter(post=post).values("pk")[:3]
+    ).delete()
+    assert stored_count(post) == 2
+
+
+def test_reconcile_fixes_drift(mixer, user, post_with_published_location):
+    post = post_with_published_location
+    Comment.objects.bulk_create(
+        Comment(post=post, author=user, text="без сигналов")
+        for _ in range(4)
+    )
+    assert stored_count(post) == 0
+    out = StringIO()
+    call_command("reconcile_comment_counts", batch_size=1, stdout=out)
+    assert stored_count(post) == 4
+    assert "исправлено: 1" in out.getvalue()
@@ -0,0 +1,52 @@
+import re
+
+import pytest
+
+from blog.constants import COMMENTS_ON_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+LOAD_MORE_RE = re.compile(r'href="([^"]+)" data-load-more')
+
+
+def test_comments_are_paginated_with_load_more(
+        client, mixer, user, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(COMMENTS_ON_PAGE * 2 + 3).blend(
+        "blog.Comment", post=post, author=user)
+    response = client.get(f"/posts/{post.id}/")
+    assert len(response.context["comments"]) == COMMENTS_ON_PAGE
+    content = response.content.decode()
+    assert f"Комментарии ({len(comments)})" in content
+
+    seen = [comment.id for comment in response.context["comments"]]
+    next_url = LOAD_MORE_RE.search(content).group(1).replace("&amp;", "&")
+    while next_url:
+        fragment = client.get(next_url)
+        assert fragment.status_code == 200
+        seen.extend(comment.id for comment in fragment.context["comments"])
+        match = LOAD_MORE_RE.search(fragment.content.decode())
+        next_url = match and match.group(1)
+    assert seen == [comment.id for comment in comments], (
+        "Убедитесь, что страницы комментариев по порядку возвращают все"
+        " комментарии к посту ровно один раз."
+    )
+
+
+def test_detail_does_not_count_comments(
+        client, comment_to_a_post, post_with_published_location,
+        django_assert_num_queries):
+    with django_assert_num_queries(2) as captured:
+        client.get(f"/posts/{post_with_published_location.id}/")
+    assert not any(
+        "COUNT(" in query["sql"] for query in captured.captured_queries)
+
+
+def test_comment_fragment_hidden_for_invisible_post(
+        another_user_client, mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=False,
+    )
+    response = another_user_client.get(f"/posts/{post.id}/comments/")
+    assert response.status_code == 404
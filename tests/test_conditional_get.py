@@ -0,0 +1,135 @@
+import time
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.utils import timezone
+from django.utils.http import parse_http_date
+
+from blog import querysets
+
+pytestmark = [pytest.mark.django_db]
+
+
+def revalidate(client, url, response):
+    return client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+
+@pytest.mark.parametrize("url", ["/", "category", "profile"])
+def test_unchanged_list_returns_304(
+        url, user_client, post_with_published_location,
+        django_assert_max_num_queries):
+    post = post_with_published_location
+    url = {
+        "/": "/",
+        "category": f"/category/{post.category.slug}/",
+        "profile": f"/profile/{post.author.username}/",
+    }[url]
+    first = user_client.get(url)
+    assert first.has_header("ETag") and first.has_header("Last-Modified")
+    with django_assert_max_num_queries(2) as captured:
+        second = revalidate(user_client, url, first)
+    assert second.status_code == HTTPStatus.NOT_MODIFIED, (
+        "Убедитесь, что неизменившаяся страница отвечает 304 на"
+        " If-None-Match."
+    )
+    assert not second.templates
+    assert not any("blog_post" in query["sql"]
+                   for query in captured.captured_queries), (
+        "Ответ 304 не должен выполнять запрос постов страницы."
+    )
+
+
+def test_new_post_changes_etag(
+        user_client, mixer, user, post_with_published_location):
+    first = user_client.get("/")
+    mixer.blend("blog.Post", author=user,
+                category=post_with_published_location.category)
+    assert revalidate(user_client, "/", first).status_code == HTTPStatus.OK
+
+
+def test_scheduled_post_changes_etag(
+        monkeypatch, user_client, mixer, user, post_with_published_location):
+    mixer.blend(
+        "blog.Post", author=user, is_published=True,
+        category=post_with_published_location.category,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+    first = user_client.get("/")
+    later = timezone.now() + timedelta(hours=2)
+    monkeypatch.setattr(querysets.timezone, "now", lambda: later)
+    assert revalidate(user_client, "/", first).status_code == HTTPStatus.OK, (
+        "Убедитесь, что наступление отложенной публикации меняет ETag ленты."
+    )
+
+
+def test_profile_last_modified_ignores_scheduled_posts(
+        client, mixer, user, post_with_published_location):
+    mixer.blend(
+        "blog.Post", author=user, is_published=True,
+        category=post_with_published_location.category,
+        pub_date=timezone.now() + timedelta(days=30),
+    )
+    url = f"/profile/{user.username}/"
+    first = client.get(url)
+    assert parse_http_date(first["Last-Modified"]) <= time.time(), (
+        "Убедитесь, что Last-Modified страницы автора не берётся из даты"
+        " отложенной публикации."
+    )
+    time.sleep(1)
+    mixer.blend("blog.Post", author=user, is_published=True,
+                category=post_with_published_location.category,
+                pub_date=timezone.now() - timedelta(minutes=1))
+    response = client.get(
+        url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_etag_depends_on_user(
+        user_client, another_user_client, post_with_published_location):
+    first = user_client.get("/")
+    response = revalidate(another_user_client, "/", first)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_detail_etag_follows_csrf_token(
+        user_client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    user_client.get(url)
+    first = user_client.get(url)
+    assert 'name="csrfmiddlewaretoken"' in first.content.decode()
+    assert revalidate(user_client, url, first).status_code == (
+        HTTPStatus.NOT_MODIFIED)
+    user_client.cookies[settings.CSRF_COOKIE_NAME] = "a" * 32
+    assert revalidate(user_client, url, first).status_code == HTTPStatus.OK, (
+        "Убедитесь, что ETag страницы с формой меняется вместе"
+        " с CSRF-токеном пользователя."
+    )
+
+
+def test_detail_revalidation(
+        client, user, post_with_published_location, mixer,
+        django_assert_num_queries):
+    url = f"/posts/{post_with_published_location.id}/"
+    first = client.get(url)
+    with django_assert_num_queries(0):
+        second = revalidate(client, url, first)
+    assert second.status_code == HTTPStatus.NOT_MODIFIED
+    second = client.get(
+        url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+    assert second.status_code == HTTPStatus.NOT_MODIFIED
+    mixer.blend("blog.Comment", post=post_with_published_location,
+                author=user)
+    assert revalidate(client, url, first).status_code == HTTPStatus.OK, (
+        "Убедитесь, что новый комментарий меняет ETag страницы поста."
+    )
+
+
+def test_page_cache_hit_honours_etag(client, post_with_published_location):
+    first = client.get("/")
+    second = client.get("/")
+    assert second.context is None
+    assert second["ETag"] == first["ETag"]
+    response = revalidate(client, "/", first)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
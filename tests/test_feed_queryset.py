@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+from blog import querysets
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_feed_filter_is_sargable():
+    sql = str(querysets.get_feed_queryset().query)
+    assert "cast_date" not in sql, (
+        "Фильтр ленты не должен приводить `pub_date` к дате: такое условие"
+        " не может использовать индекс."
+    )
+
+
+@override_settings(BLOG_PUBLISH_TIME_BUCKET=60)
+def test_publish_now_is_bucketed(monkeypatch):
+    base = datetime(2024, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+    monkeypatch.setattr(
+        querysets.timezone, "now", lambda: base + timedelta(seconds=5))
+    first = querysets.get_feed_queryset().query.sql_with_params()
+    monkeypatch.setattr(
+        querysets.timezone, "now", lambda: base + timedelta(seconds=55))
+    second = querysets.get_feed_queryset().query.sql_with_params()
+    assert first == second
+    assert querysets.get_publish_now() == base
+
+
+def test_scheduled_post_appears_without_restart(
+        monkeypatch, client, mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(hours=1),
+    )
+    response = client.get("/")
+    assert post not in response.context["page_obj"]
+    later = timezone.now() + timedelta(hours=2)
+    monkeypatch.setattr(querysets.timezone, "now", lambda: later)
+    response = client.get("/")
+    assert post in response.context["page_obj"], (
+        "Убедитесь, что отложенная публикация появляется в ленте, когда"
+        " наступает время публикации, без перезапуска приложения."
+    )
@@ -0,0 +1,76 @@
+from datetime import timedelta
+from http import HTTPStatus
+from xml.etree import ElementTree
+
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+def read(response):
+    if response.streaming:
+        return b"".join(response.streaming_content)
+    return response.content
+
+
+@pytest.fixture
+def feed_posts(mixer, user, published_category):
+    visible = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1))
+    mixer.blend("blog.Post", author=user, category=published_category,
+                is_published=False)
+    mixer.blend("blog.Post", author=user, category=published_category,
+                is_published=True,
+                pub_date=timezone.now() + timedelta(days=1))
+    return visible
+
+
+def test_rss_lists_visible_posts(client, feed_posts):
+    response = client.get("/feed/rss/")
+    assert response.streaming, "Убедитесь, что фид отдаётся потоком."
+    assert response["Content-Type"].startswith("application/rss+xml")
+    channel = ElementTree.fromstring(read(response)).find("channel")
+    titles = [item.findtext("title") for item in channel.iter("item")]
+    assert sorted(titles) == sorted(post.title for post in feed_posts), (
+        "Убедитесь, что фид показывает только видимые публикации."
+    )
+
+
+def test_atom_scopes(client, feed_posts, user, published_category):
+    for url in (f"/category/{published_category.slug}/feed/atom/",
+                f"/profile/{user.username}/feed/atom/"):
+        root = ElementTree.fromstring(read(client.get(url)))
+        assert root.tag == f"{ATOM}feed"
+        assert len(root.findall(f"{ATOM}entry")) == len(feed_posts), url
+
+
+def test_feed_is_cached_until_scope_changes(
+        client, feed_posts, mixer, user, published_category,
+        django_assert_max_num_queries):
+    first = read(client.get("/feed/rss/"))
+    with django_assert_max_num_queries(0):
+        second = client.get("/feed/rss/")
+    assert not second.streaming and second.content == first, (
+        "Убедитесь, что готовый документ фида берётся из кэша."
+    )
+    post = mixer.blend("blog.Post", author=user, is_published=True,
+                       category=published_category)
+    assert post.title.encode() in read(client.get("/feed/rss/"))
+
+
+def test_feed_conditional_get(client, feed_posts):
+    response = client.get("/feed/atom/")
+    read(response)
+    repeated = client.get("/feed/atom/", HTTP_IF_NONE_MATCH=response["ETag"])
+    assert repeated.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_unknown_format_and_hidden_category(client, mixer):
+    hidden = mixer.blend("blog.Category", is_published=False)
+    assert client.get("/feed/json/").status_code == HTTPStatus.NOT_FOUND
+    response = client.get(f"/category/{hidden.slug}/feed/rss/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,80 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from django.core.files.images import ImageFile
+
+from blog.constants import IMAGE_VARIANTS
+from blog.images import get_variant_name
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_image(name, size=(2000, 1000)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color=(73, 109, 137)).save(buffer, format="PNG")
+    return ImageFile(buffer, name=name)
+
+
+def variant_width(post, variant):
+    storage = post.image.storage
+    with storage.open(get_variant_name(post.image.name, variant)) as file:
+        return Image.open(file).width
+
+
+@pytest.fixture
+def post_with_big_image(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, image=make_image("big.png"),
+    )
+
+
+def test_variants_created_on_upload(post_with_big_image):
+    for variant, (width, _) in IMAGE_VARIANTS.items():
+        assert variant_width(post_with_big_image, variant) == width
+
+
+def test_variants_replaced_when_image_changes(post_with_big_image):
+    storage = post_with_big_image.image.storage
+    old_card = get_variant_name(post_with_big_image.image.name, "card")
+    post_with_big_image.image = make_image("other.png", size=(900, 300))
+    post_with_big_image.save()
+    assert not storage.exists(old_card)
+    assert variant_width(post_with_big_image, "card") == 640
+    assert variant_width(post_with_big_image, "detail") == 900
+
+
+def test_pages_reference_variants(user_client, post_with_big_image):
+    card = get_variant_name(post_with_big_image.image.name, "card")
+    detail = get_variant_name(post_with_big_image.image.name, "detail")
+    assert card in user_client.get("/").content.decode()
+    detail_page = user_client.get(f"/posts/{post_with_big_image.id}/")
+    assert detail in detail_page.content.decode()
+
+
+def test_missing_variant_created_on_first_request(
+        user_client, post_with_big_image):
+    storage = post_with_big_image.image.storage
+    card = get_variant_name(post_with_big_image.image.name, "card")
+    storage.delete(card)
+    user_client.get("/")
+    assert storage.exists(card)
+
+
+def test_variants_do_not_overwrite_uploads(mixer, user, published_category):
+    def make_post(image):
+        return mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            is_published=True, image=image)
+
+    clashing = make_post(make_image("clash_card.jpg", size=(300, 200)))
+    storage = clashing.image.storage
+    original = clashing.image.name
+    make_post(make_image("clash.png")).delete()
+    assert storage.exists(original), (
+        "Убедитесь, что создание и удаление вариантов не трогает загруженные"
+        " пользователями файлы."
+    )
+    with storage.open(original) as file:
+        assert Image.open(file).width == 300
@@ -0,0 +1,46 @@
+import pytest
+from django.db import connection
+
+from blog.models import Post
+from blog.querysets import add_filter_post_list, filter_profile_post_list
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_post_table_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        details = [row[-1] for row in cursor.fetchall()]
+    return [detail for detail in details if " blog_post " in f"{detail} "]
+
+
+@pytest.mark.parametrize(
+    "build_queryset, index_name",
+    [
+        (
+            lambda user, category: add_filter_post_list(
+                filter_profile_post_list(Post.objects)),
+            "post_published_pub_date_idx",
+        ),
+        (
+            lambda user, category: filter_profile_post_list(user.posts),
+            "post_author_pub_date_idx",
+        ),
+        (
+            lambda user, category: add_filter_post_list(
+                filter_profile_post_list(category.posts)),
+            "post_category_pub_date_idx",
+        ),
+    ],
+    ids=["feed", "profile", "category"],
+)
+def test_feed_queries_use_indexes(
+        user, published_category, build_queryset, index_name):
+    queryset = build_queryset(user, published_category)[:11]
+    plan = get_post_table_plan(queryset)
+    assert plan, "В плане запроса нет обращения к таблице blog_post."
+    assert all(f"USING INDEX {index_name}" in step for step in plan), (
+        f"Ожидалось, что выборка публикаций использует индекс `{index_name}`,"
+        f" а план запроса: {plan}"
+    )
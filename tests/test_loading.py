@@ -0,0 +1,45 @@
+import io
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from blog.loading import iter_json_array
+from blog.models import Category, Comment, Location, Post
+
+pytestmark = [pytest.mark.django_db]
+
+DB_JSON = Path(__file__).resolve().parent.parent / "db.json"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_iter_json_array_matches_json_load(chunk_size):
+    data = [{"a": 1, "b": "строка с ] и ,"}, {"c": [1, 2, {"d": None}]}, {}]
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    parsed = list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+    assert parsed == data
+
+
+def test_iter_json_array_rejects_truncated_input():
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('[{"a": 1}, {"b": '), chunk_size=4))
+
+
+def test_load_db_json_fixture():
+    out = StringIO()
+    call_command("load_blog_fixture", str(DB_JSON), batch_size=10,
+                 stdout=out)
+    expected = json.loads(DB_JSON.read_text(encoding="utf-8"))
+
+    def count(label):
+        return sum(obj["model"] == label for obj in expected)
+
+    assert get_user_model().objects.count() == count("auth.user")
+    assert Category.objects.count() == count("blog.category")
+    assert Location.objects.count() == count("blog.location")
+    assert Post.objects.count() == count("blog.post")
+    assert Comment.objects.count() == count("blog.comment")
+    assert "строк/с" in out.getvalue()
@@ -0,0 +1,198 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+
+from blog import signals
+
+pytestmark = [pytest.mark.django_db]
+
+
+def is_cache_hit(response):
+    return response.context is None
+
+
+def revalidate(client, url, response):
+    return client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+
+@pytest.fixture
+def category_pages(mixer, user, another_user, published_category,
+                   another_category, published_location):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location, is_published=True,
+    )
+    mixer.blend(
+        "blog.Post", author=another_user, category=another_category,
+        location=published_location, is_published=True,
+    )
+    return {
+        "feed": "/",
+        "category": f"/category/{published_category.slug}/",
+        "author": f"/profile/{user.username}/",
+        "other_category": f"/category/{another_category.slug}/",
+        "other_author": f"/profile/{another_user.username}/",
+        "post": post,
+    }
+
+
+def test_anonymous_hit_skips_database(
+        client, category_pages, django_assert_num_queries):
+    first = client.get(category_pages["feed"])
+    with django_assert_num_queries(0):
+        second = client.get(category_pages["feed"])
+    assert is_cache_hit(second)
+    assert second.content == first.content
+
+
+def test_logged_in_users_bypass_cache(user_client, category_pages):
+    user_client.get(category_pages["feed"])
+    assert not is_cache_hit(user_client.get(category_pages["feed"]))
+
+
+def test_comment_invalidates_only_affected_pages(
+        client, mixer, user, category_pages):
+    urls = [url for name, url in category_pages.items() if name != "post"]
+    for url in urls:
+        client.get(url)
+    mixer.blend("blog.Comment", post=category_pages["post"], author=user)
+    for name in ("feed", "category", "author"):
+        assert not is_cache_hit(client.get(category_pages[name])), (
+            f"Страница `{name}` должна обновиться после нового комментария."
+        )
+    for name in ("other_category", "other_author"):
+        assert is_cache_hit(client.get(category_pages[name])), (
+            f"Страница `{name}` не связана с постом и должна остаться"
+            " в кэше."
+        )
+
+
+def test_category_change_invalidates_only_its_pages(
+        client, published_category, category_pages):
+    for name, url in category_pages.items():
+        if name != "post":
+            client.get(url)
+    published_category.title = "Переименованная категория"
+    published_category.save()
+    for name in ("feed", "category", "author", "other_author"):
+        assert not is_cache_hit(client.get(category_pages[name])), (
+            f"Страница `{name}` показывает категорию и должна обновиться."
+        )
+    assert is_cache_hit(client.get(category_pages["other_category"])), (
+        "Страница другой категории не показывает категорию и должна"
+        " остаться в кэше."
+    )
+
+
+def test_category_change_touches_constant_number_of_scopes(
+        monkeypatch, mixer, user, published_category, category_pages):
+    mixer.cycle(30).blend("blog.Post", author=user,
+                          category=published_category, is_published=True)
+    touched = []
+    monkeypatch.setattr(signals, "touch_scopes",
+                        lambda *scopes: touched.extend(filter(None, scopes)))
+    published_category.title = "Переименованная категория"
+    published_category.save()
+    assert len(touched) <= 6 and not any(
+        scope.startswith("post:") for scope in touched), (
+        "Убедитесь, что правка категории не перебирает её посты и сбрасывает"
+        " постоянное число областей кэша."
+    )
+
+
+def test_related_changes_refresh_post_page(
+        client, mixer, user, published_category, category_pages):
+    post = category_pages["post"]
+    other = mixer.blend("blog.Post", author=user, is_published=True,
+                        category=mixer.blend("blog.Category",
+                                             is_published=True))
+    urls = [f"/posts/{post.id}/", f"/posts/{other.id}/"]
+    first = [client.get(url) for url in urls]
+    published_category.title = "Переименованная категория"
+    published_category.save()
+    assert revalidate(client, urls[0], first[0]).status_code == 200, (
+        "Убедитесь, что правка категории меняет ETag страниц её постов."
+    )
+    assert revalidate(client, urls[1], first[1]).status_code == 304
+    first[0] = client.get(urls[0])
+    post.location.name = "Новое место"
+    post.location.save()
+    response = revalidate(client, urls[0], first[0])
+    assert response.status_code == 200, (
+        "Убедитесь, что правка места меняет ETag страниц его постов."
+    )
+    assert "Новое место" in response.content.decode()
+
+
+def test_category_slug_change_invalidates_old_address(
+        client, published_category, category_pages):
+    client.get(category_pages["category"])
+    published_category.slug = "new-slug"
+    published_category.save()
+    assert client.get(category_pages["category"]).status_code == 404
+
+
+def test_location_delete_invalidates_pages_of_its_posts(
+        client, category_pages):
+    client.get(category_pages["other_author"])
+    category_pages["post"].location.delete()
+    assert not is_cache_hit(client.get(category_pages["other_author"])), (
+        "Убедитесь, что удаление места обновляет страницы его постов."
+    )
+
+
+def test_user_changes_invalidate_only_their_pages(
+        client, mixer, django_user_model, another_user, category_pages):
+    urls = [url for name, url in category_pages.items() if name != "post"]
+    for url in urls:
+        client.get(url)
+    django_user_model.objects.create_user("newcomer", password="x" * 12)
+    another_user.first_name = "Новое имя"
+    another_user.save()
+    assert not is_cache_hit(client.get(category_pages["other_author"])), (
+        "Убедитесь, что правка профиля обновляет страницу автора."
+    )
+    for name in ("feed", "category", "author", "other_category"):
+        assert is_cache_hit(client.get(category_pages[name])), (
+            "Убедитесь, что регистрация и правка профиля без смены имени"
+            f" не сбрасывают страницу `{name}`."
+        )
+
+
+def test_username_change_refreshes_pages_with_the_name(
+        client, mixer, another_user, category_pages):
+    post = category_pages["post"]
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    url = f"/posts/{post.id}/"
+    first = client.get(url)
+    client.get(category_pages["other_category"])
+    another_user.username = "renamed"
+    another_user.save()
+    response = revalidate(client, url, first)
+    assert response.status_code == 200, (
+        "Убедитесь, что смена имени обновляет страницы постов с"
+        " комментариями пользователя."
+    )
+    assert "renamed" in response.content.decode()
+    assert not is_cache_hit(client.get(category_pages["other_category"]))
+
+
+def test_invalidation_reaches_other_processes(
+        client, category_pages, shared_cache_location):
+    client.get(category_pages["feed"])
+    assert is_cache_hit(client.get(category_pages["feed"]))
+    subprocess.run(
+        [sys.executable, "-c",
+         "import django; django.setup();"
+         " from blog.caching import FEED_SCOPE, touch_scopes;"
+         " touch_scopes(FEED_SCOPE)"],
+        cwd=settings.BASE_DIR, check=True,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "blogicum.settings",
+             "BLOG_SHARED_CACHE_LOCATION": str(shared_cache_location)})
+    assert not is_cache_hit(client.get(category_pages["feed"])), (
+        "Убедитесь, что сброс области в другом процессе сервера доходит до"
+        " этого процесса."
+    )
@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _walk_feed(client, url):
+    seen = []
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    page = response.context["page_obj"]
+    seen.extend(post.id for post in page)
+    while page.has_next():
+        response = client.get(url, {"after": page.next_cursor})
+        assert response.status_code == HTTPStatus.OK
+        page = response.context["page_obj"]
+        seen.extend(post.id for post in page)
+    return seen, page
+
+
+def test_cursor_pagination_walks_whole_feed(
+        user_client, many_posts_with_published_locations, PostModel):
+    expected = list(
+        PostModel.objects.order_by("-pub_date", "-id")
+        .values_list("id", flat=True)
+    )
+    seen, last_page = _walk_feed(user_client, "/")
+    assert seen == expected, (
+        "Убедитесь, что курсорная пагинация ленты проходит по всем"
+        " публикациям ровно один раз в порядке убывания даты."
+    )
+    response = user_client.get("/", {"before": last_page.previous_cursor})
+    previous = [post.id for post in response.context["page_obj"]]
+    assert previous == expected[-N_PER_PAGE - len(last_page):-len(last_page)]
+
+
+def test_cursor_pagination_skips_count_query(
+        user_client, many_posts_with_published_locations,
+        django_assert_max_num_queries):
+    response = user_client.get("/")
+    token = response.context["page_obj"].next_cursor
+    with django_assert_max_num_queries(3) as captured:
+        user_client.get("/", {"after": token})
+    assert not any(
+        "COUNT(" in query["sql"] and "GROUP BY" not in query["sql"]
+        for query in captured.captured_queries
+    ), "Курсорная пагинация не должна выполнять COUNT(*) по ленте."
+
+
+def test_invalid_cursor_returns_404(user_client):
+    response = user_client.get("/", {"after": "not-a-cursor"})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_page_mode_still_available(
+        user_client, many_posts_with_published_locations):
+    response = user_client.get("/", {"page": 2})
+    assert response.status_code == HTTPStatus.OK
+    page = response.context["page_obj"]
+    assert page.number == 2
+    assert len(page) == N_PER_PAGE
@@ -0,0 +1,37 @@
+import pytest
+
+from blog.cards import CARD_TEMPLATE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def rendered_card_count(response):
+    return sum(
+        template.name == CARD_TEMPLATE for template in response.templates)
+
+
+def test_cards_are_rendered_once(
+        user_client, many_posts_with_published_locations):
+    first = user_client.get("/")
+    assert rendered_card_count(first) == 10
+    second = user_client.get("/")
+    assert rendered_card_count(second) == 0, (
+        "Убедитесь, что карточки постов берутся из кэша при повторном"
+        " открытии страницы."
+    )
+    assert first.content == second.content
+
+
+def test_card_refreshes_on_related_change(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    user_client.get("/")
+    post.category.title = "Новое название категории"
+    post.category.save()
+    post.author.username = "renamed_author"
+    post.author.save()
+    response = user_client.get("/")
+    assert rendered_card_count(response) == 1
+    content = response.content.decode()
+    assert "Новое название категории" in content
+    assert "@renamed_author" in content
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.counters import _actual_counts
+from blog.models import Post, PostCounter
+
+pytestmark = [pytest.mark.django_db]
+
+
+def stored_counts():
+    return {scope: value for scope, value
+            in PostCounter.objects.values_list("scope", "value") if value}
+
+
+def assert_counters_match():
+    actual = {scope: value for scope, value in _actual_counts().items()
+              if value}
+    assert stored_counts() == actual, (
+        "Убедитесь, что счётчики постов совпадают с фактическим числом"
+        " постов после каждого изменения."
+    )
+
+
+def test_counters_follow_post_changes(
+        mixer, user, another_user, published_category, another_category):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True)
+    assert_counters_match()
+    posts[0].is_published = False
+    posts[0].save()
+    assert_counters_match()
+    posts[1].category = another_category
+    posts[1].author = another_user
+    posts[1].save()
+    assert_counters_match()
+    posts[2].delete()
+    assert_counters_match()
+    user.delete()
+    assert_counters_match()
+
+
+def test_counters_follow_category_changes(
+        mixer, user, published_category, another_category):
+    mixer.cycle(2).blend("blog.Post", author=user, is_published=True,
+                         category=published_category)
+    mixer.blend("blog.Post", author=user, is_published=True,
+                category=another_category)
+    published_category.is_published = False
+    published_category.save()
+    assert PostCounter.objects.get(scope="feed").value == 1
+    assert_counters_match()
+    published_category.is_published = True
+    published_category.save()
+    assert_counters_match()
+    another_category.delete()
+    assert_counters_match()
+
+
+def test_page_mode_reads_counter(
+        user_client, mixer, user, published_category,
+        many_posts_with_published_locations, django_assert_max_num_queries):
+    mixer.blend("blog.Post", author=user, category=published_category,
+                is_published=True,
+                pub_date=timezone.now() + timedelta(days=1))
+    with django_assert_max_num_queries(6) as captured:
+        response = user_client.get("/", {"page": 1})
+    counts = [query["sql"] for query in captured.captured_queries
+              if "COUNT(" in query["sql"]]
+    assert all('"pub_date" >' in sql for sql in counts), (
+        "Постраничный режим должен брать общее число постов из счётчика,"
+        " считая только отложенные публикации."
+    )
+    paginator = response.context["paginator"]
+    assert paginator.count == len(many_posts_with_published_locations)
+
+
+def test_reconcile_fixes_drift(mixer, user, published_category):
+    mixer.cycle(2).blend("blog.Post", author=user, is_published=True,
+                         category=published_category)
+    PostCounter.objects.filter(scope="feed").update(value=100)
+    PostCounter.objects.create(scope="author:999", value=5)
+    Post.objects.filter(pk=Post.objects.first().pk).update(
+        is_published=False)
+    out = StringIO()
+    call_command("reconcile_post_counters", stdout=out)
+    assert "исправлено: 3" in out.getvalue()
+    assert_counters_match()
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_anonymous_detail_query_budget(
+        client, comment_to_a_post, post_with_published_location,
+        django_assert_num_queries):
+    url = f"/posts/{post_with_published_location.id}/"
+    with django_assert_num_queries(2):
+        response = client.get(url)
+    assert response.status_code == 200
+
+
+def test_author_detail_query_budget(
+        user_client, comment_to_a_post, post_with_published_location,
+        django_assert_num_queries):
+    url = f"/posts/{post_with_published_location.id}/"
+    with django_assert_num_queries(3):
+        response = user_client.get(url)
+    assert response.status_code == 200
+
+
+def test_hidden_post_visible_to_author_only(
+        user_client, another_user_client, mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(days=1),
+    )
+    url = f"/posts/{post.id}/"
+    assert user_client.get(url).status_code == 200
+    assert another_user_client.get(url).status_code == 404
@@ -0,0 +1,125 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections, router
+
+from blog.caching import FEED_SCOPE, GLOBAL_SCOPE, get_scope_stamps
+from blog.models import Post
+from blog.routers import read_from_replicas
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+ALIAS = "replica_test"
+
+
+@pytest.fixture
+def replica(tmp_path, settings):
+    """Вторая база-файл, которую заполняет backup API."""
+    connections.databases[ALIAS] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": str(tmp_path / "replica.sqlite3")}
+    connections.ensure_defaults(ALIAS)
+    connections.prepare_test_settings(ALIAS)
+    settings.BLOG_REPLICAS = [ALIAS]
+    yield ALIAS
+    connections[ALIAS].close()
+    del connections.databases[ALIAS]
+    if hasattr(connections._connections, ALIAS):
+        delattr(connections._connections, ALIAS)
+
+
+def sync():
+    call_command("sync_replica", stdout=StringIO())
+
+
+def test_sync_replica_copies_primary(replica, make_post):
+    make_post()
+    out = StringIO()
+    call_command("sync_replica", stdout=out)
+    assert f"{ALIAS}: скопировано страниц" in out.getvalue()
+    assert Post.objects.using(ALIAS).count() == 1, (
+        "Убедитесь, что sync_replica копирует основную базу в реплику."
+    )
+
+
+def test_get_requests_read_from_replica(client, replica, make_post):
+    synced = make_post()
+    sync()
+    fresh = make_post()
+    content = client.get("/").content.decode()
+    assert synced.title in content
+    assert fresh.title not in content, (
+        "Убедитесь, что GET-запросы ленты читают посты с реплики."
+    )
+    assert client.get(f"/posts/{fresh.id}/").status_code == 404
+
+
+def test_pages_from_lagging_replica_are_not_cached(
+        client, replica, make_post):
+    def get_feed():
+        response = client.get("/")
+        return response, response.context is None
+
+    make_post()
+    get_scope_stamps(GLOBAL_SCOPE, FEED_SCOPE)
+    sync()
+    response, hit = get_feed()
+    assert not hit and response.has_header("ETag")
+    assert get_feed()[1], "Страница с актуальной реплики кэшируется."
+    fresh = make_post()
+    response, hit = get_feed()
+    assert not hit and fresh.title not in response.content.decode()
+    assert not response.has_header("ETag"), (
+        "Убедитесь, что ответ с отстающей реплики не получает валидаторов."
+    )
+    assert not get_feed()[1], (
+        "Убедитесь, что страница с отстающей реплики не кэшируется."
+    )
+    sync()
+    response, hit = get_feed()
+    assert fresh.title in response.content.decode()
+    assert get_feed()[1]
+
+
+def test_write_pins_client_to_primary(client, replica, make_post, user):
+    post = make_post()
+    sync()
+    client.force_login(user)
+    response = client.post(f"/posts/{post.id}/comment/",
+                           {"text": "Свежий комментарий"})
+    assert "blog_primary" in response.cookies, (
+        "Убедитесь, что ответ на запрос с записью закрепляет клиента за"
+        " основной базой."
+    )
+    detail = f"/posts/{post.id}/"
+    assert "Свежий комментарий" in client.get(detail).content.decode(), (
+        "Убедитесь, что автор сразу видит свою правку."
+    )
+    other = client.__class__()
+    assert "Свежий комментарий" not in other.get(detail).content.decode()
+
+
+def test_admin_reads_primary(admin_client, replica, make_post):
+    sync()
+    post = make_post()
+    response = admin_client.get("/admin/blog/post/")
+    assert post.title in response.content.decode(), (
+        "Убедитесь, что админка читает основную базу."
+    )
+
+
+def test_router_rules(replica, make_post):
+    assert router.db_for_read(Post) == "default"
+    with read_from_replicas():
+        assert router.db_for_read(Post) == ALIAS
+        assert Post.objects.db == ALIAS
+        make_post()
+        assert router.db_for_read(Post) == "default", (
+            "Убедитесь, что после записи запрос читает основную базу."
+        )
+    with read_from_replicas():
+        assert router.db_for_read(get_user_model()) == "default"
+    assert router.db_for_write(Post) == "default"
+    assert not router.allow_migrate(ALIAS, "blog")
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def search(client, query, **params):
+    response = client.get("/search/", {"q": query, **params})
+    return response, [post.id for post in response.context["page_obj"]]
+
+
+def test_results_are_ranked_and_highlighted(client, make_post):
+    in_text = make_post(title="Прогулка", text="Вечером видели маяк у моря.")
+    in_title = make_post(title="Маяк", text="Старый маяк на скале.")
+    make_post(title="Другое", text="Ничего общего.")
+    response, ids = search(client, "маяк")
+    assert ids == [in_title.id, in_text.id], (
+        "Убедитесь, что поиск находит посты по заголовку и тексту и"
+        " ставит совпадения в заголовке выше."
+    )
+    assert "<mark>маяк</mark>" in response.content.decode().lower()
+
+
+def test_hidden_posts_are_not_found(client, make_post, mixer):
+    hidden_category = mixer.blend("blog.Category", is_published=False)
+    make_post(text="маяк", is_published=False)
+    make_post(text="маяк", pub_date=timezone.now() + timedelta(days=1))
+    make_post(text="маяк", category=hidden_category)
+    visible = make_post(text="маяк")
+    assert search(client, "маяк")[1] == [visible.id], (
+        "Убедитесь, что поиск применяет те же правила видимости, что и"
+        " лента."
+    )
+
+
+def test_index_follows_post_changes(client, make_post):
+    post = make_post(text="маяк")
+    post.text = "вокзал"
+    post.save()
+    assert search(client, "маяк")[1] == []
+    assert search(client, "вокзал")[1] == [post.id]
+    post.delete()
+    assert search(client, "вокзал")[1] == []
+
+
+def test_snippet_is_escaped(client, make_post):
+    make_post(text="маяк <script>alert(1)</script>")
+    content = search(client, "маяк")[0].content.decode()
+    assert "<script>alert" not in content
+    assert "&lt;script&gt;" in content
+
+
+def test_query_syntax_is_not_passed_to_fts(client, make_post):
+    post = make_post(text="маяк")
+    response, ids = search(client, 'маяк" OR NEAR(')
+    assert response.status_code == 200
+    assert ids == []
+    assert search(client, "МАЯ")[1] == [post.id]
+
+
+def test_cursor_pagination_over_results(client, make_post):
+    posts = [make_post(text="маяк " * (index + 1)) for index in range(15)]
+    seen, after = [], None
+    while True:
+        params = {"after": after} if after else {}
+        response, ids = search(client, "маяк", **params)
+        seen.extend(ids)
+        after = response.context["page_obj"].next_cursor
+        if not after:
+            break
+    assert sorted(seen) == sorted(post.id for post in posts)
+    assert len(seen) == len(set(seen))
+
+
+def test_numbered_pages_keep_rank_order(client, make_post):
+    posts = [
+        make_post(text="маяк " * (index + 1) + "море " * 30,
+                  pub_date=timezone.now() - timedelta(days=index + 1))
+        for index in range(15)
+    ]
+    ranked = [post.id for post in reversed(posts)]
+    assert search(client, "маяк", page=1)[1] == ranked[:10]
+    assert search(client, "маяк", page=2)[1] == ranked[10:], (
+        "Убедитесь, что и при постраничной навигации `?page=N` результаты"
+        " поиска упорядочены по релевантности."
+    )
+
+
+def test_numbered_page_links_keep_query(client, make_post):
+    for index in range(15):
+        make_post(text="маяк " * (index + 1))
+    response, _ = search(client, "маяк", page=2)
+    content = response.content.decode()
+    assert "?q=%D0%BC%D0%B0%D1%8F%D0%BA&page=1" in content, (
+        "Убедитесь, что ссылки постраничной навигации поиска сохраняют"
+        " запрос `q`."
+    )
+    assert "?page=" not in content
+
+
+def test_rebuild_command(client, make_post):
+    post = make_post(text="маяк")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('delete-all')")
+    assert search(client, "маяк")[1] == []
+    out = StringIO()
+    call_command("rebuild_search_index", "--batch-size", "1", stdout=out)
+    assert "Проиндексировано публикаций: 1" in out.getvalue()
+    assert search(client, "маяк")[1] == [post.id]
@@ -0,0 +1,68 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import Count, F
+from django.utils import timezone
+
+from blog.models import Category, Comment, Post
+from blog.seeding import seed_blog
+
+pytestmark = [pytest.mark.django_db]
+
+
+def snapshot():
+    return list(Post.objects.order_by("pk").values_list(
+        "pk", "title", "is_published", "category_id", "comment_count"))
+
+
+def test_seed_is_deterministic():
+    seed_blog(users=5, categories=4, locations=3, posts=50, seed=7)
+    first = snapshot()
+    for model in (Comment, Post, Category):
+        model.objects.all().delete()
+    seed_blog(users=0, categories=4, locations=0, posts=50, seed=7)
+    assert [row[1:3] for row in snapshot()] == [row[1:3] for row in first]
+
+
+def test_seed_mixes_post_states_and_counts_comments():
+    seed_blog(users=10, categories=10, locations=5, posts=2000,
+              unpublished_share=0.1, future_share=0.1,
+              hidden_category_share=0.1, batch_size=300)
+    now = timezone.now()
+    assert Post.objects.count() == 2000
+    for queryset in (
+        Post.objects.filter(is_published=False),
+        Post.objects.filter(pub_date__gt=now),
+        Post.objects.filter(category__is_published=False),
+    ):
+        assert 100 < queryset.count() < 350
+    drift = (Post.objects.annotate(actual=Count("comments"))
+             .exclude(comment_count=F("actual")))
+    assert not drift.exists(), (
+        "Счётчик comment_count сгенерированных постов должен совпадать"
+        " с числом созданных комментариев."
+    )
+
+
+def test_seed_blog_command_reports_rate():
+    out = StringIO()
+    call_command("seed_blog", posts=30, users=3, stdout=out)
+    assert "строк/с" in out.getvalue()
+    assert Post.objects.count() == 30
+
+
+def test_seed_keeps_a_published_category():
+    seed_blog(users=2, categories=1, locations=1, posts=20)
+    assert Category.objects.filter(is_published=True).count() == 1, (
+        "Убедитесь, что seed_blog оставляет хотя бы одну категорию"
+        " опубликованной."
+    )
+    assert Post.objects.count() == 20
+
+
+def test_seed_blog_command_without_categories_fails_cleanly():
+    with pytest.raises(CommandError):
+        call_command("seed_blog", posts=5, users=1, categories=0,
+                     stdout=StringIO())
+    assert not Post.objects.exists()
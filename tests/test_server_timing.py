@@ -0,0 +1,52 @@
+import pytest
+from django.test import override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for item in header.split(", "):
+        name, *params = item.split(";")
+        values = dict(param.split("=", 1) for param in params)
+        desc = values.get("desc", "").strip("\"")
+        metrics[name] = (float(values["dur"]), desc)
+    return metrics
+
+
+@override_settings(BLOG_SERVER_TIMING=True)
+def test_phases_add_up_to_total(
+        user_client, many_posts_with_published_locations):
+    response = user_client.get("/")
+    assert response.has_header("Server-Timing"), (
+        "Убедитесь, что при BLOG_SERVER_TIMING ответ содержит заголовок"
+        " Server-Timing."
+    )
+    metrics = parse_server_timing(response["Server-Timing"])
+    assert {"db", "view", "tpl", "mw", "total"} <= set(metrics)
+    phases = sum(metrics[name][0] for name in ("db", "view", "tpl", "mw"))
+    assert phases == pytest.approx(metrics["total"][0], abs=0.5)
+    assert metrics["db"][1].endswith("SQL")
+    assert metrics["inc"][1].startswith("includes/"), (
+        "Убедитесь, что Server-Timing называет самый долгий вложенный"
+        " шаблон."
+    )
+
+
+@override_settings(BLOG_SERVER_TIMING=False)
+def test_disabled_by_setting(user_client):
+    assert not user_client.get("/").has_header("Server-Timing")
+    response = user_client.get("/?server_timing=1")
+    assert not response.has_header("Server-Timing"), (
+        "Убедитесь, что включить Server-Timing параметром может только"
+        " персонал."
+    )
+
+
+def test_staff_can_toggle_per_request(admin_client):
+    with override_settings(BLOG_SERVER_TIMING=False):
+        response = admin_client.get("/?server_timing=1")
+        assert response.has_header("Server-Timing")
+    with override_settings(BLOG_SERVER_TIMING=True):
+        response = admin_client.get("/?server_timing=0")
+        assert not response.has_header("Server-Timing")
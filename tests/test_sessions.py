@@ -0,0 +1,118 @@
+import os
+import pickle
+import subprocess
+import sys
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.auth import user_cache_key
+from blog.caching import shared_cache
+
+pytestmark = [pytest.mark.django_db]
+
+SESSION_TABLES = ('FROM "django_session"', 'FROM "auth_user"')
+
+
+@pytest.fixture
+def post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1))
+
+
+def session_queries(client, url="/"):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return [query["sql"] for query in queries
+            if any(table in query["sql"] for table in SESSION_TABLES)]
+
+
+@pytest.mark.parametrize("engine", ["cached_db", "signed_cookies"])
+def test_feed_of_logged_in_user_skips_session_tables(
+        settings, user, post, engine):
+    settings.SESSION_ENGINE = f"django.contrib.sessions.backends.{engine}"
+    client = Client()
+    client.force_login(user)
+    session_queries(client)
+    assert session_queries(client) == [], (
+        "Убедитесь, что повторная страница ленты вошедшего пользователя не"
+        " читает сессию и пользователя из базы."
+    )
+    assert user.username in client.get("/").content.decode()
+
+
+def test_profile_change_refreshes_cached_user(user_client, user, post):
+    session_queries(user_client)
+    user.first_name = "Обновлённое"
+    user.save()
+    assert session_queries(user_client), (
+        "Убедитесь, что изменение пользователя сбрасывает его кэш."
+    )
+    response = user_client.get("/edit_profile/")
+    assert "Обновлённое" in response.content.decode()
+
+
+def test_password_change_ends_other_sessions(user_client, user, post):
+    session_queries(user_client)
+    user.set_password("new-password-123")
+    user.save()
+    response = user_client.get("/edit_profile/")
+    assert response.status_code == HTTPStatus.FOUND, (
+        "Убедитесь, что после смены пароля старая сессия не действует."
+    )
+
+
+def test_stale_session_hash_is_rejected(user_client):
+    user_client.get("/edit_profile/")
+    session = user_client.session
+    session["_auth_user_hash"] = "0" * len(session["_auth_user_hash"])
+    session.save()
+    response = user_client.get("/edit_profile/")
+    assert response.status_code == HTTPStatus.FOUND, (
+        "Убедитесь, что пользователь из кэша проверяется по хэшу сессии."
+    )
+
+
+def test_user_change_in_other_process_is_seen(
+        user_client, user, post, shared_cache_location):
+    session_queries(user_client)
+    assert session_queries(user_client) == []
+    subprocess.run(
+        [sys.executable, "-c",
+         "import django; django.setup();"
+         " from blog.auth import forget_user;"
+         f" forget_user({user.pk})"],
+        cwd=settings.BASE_DIR, check=True,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "blogicum.settings",
+             "BLOG_SHARED_CACHE_LOCATION": str(shared_cache_location)})
+    assert session_queries(user_client), (
+        "Убедитесь, что пользователь сессии хранится в общем для процессов"
+        " кэше и его сброс в одном процессе действует во всех."
+    )
+
+
+def test_cached_user_has_no_password_hash(user_client, user, post):
+    session_queries(user_client)
+    assert session_queries(user_client) == []
+    cached = pickle.dumps(shared_cache.get(user_cache_key(user.pk)))
+    assert user.password.encode() not in cached, (
+        "Убедитесь, что хэш пароля пользователя не хранится в кэше."
+    )
+    response = user_client.post("/edit_profile/", {
+        "username": user.username, "first_name": "Новое",
+        "last_name": user.last_name, "email": "new@example.com"})
+    assert response.status_code == HTTPStatus.FOUND
+    password = user.password
+    user.refresh_from_db()
+    assert user.first_name == "Новое"
+    assert user.password == password, (
+        "Убедитесь, что сохранение пользователя из кэша не затирает пароль."
+    )
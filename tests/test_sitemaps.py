@@ -0,0 +1,138 @@
+from datetime import timedelta
+from http import HTTPStatus
+from xml.etree import ElementTree
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import caching, sitemaps
+
+pytestmark = [pytest.mark.django_db]
+
+NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+
+def read(response):
+    if response.streaming:
+        return b"".join(response.streaming_content)
+    return response.content
+
+
+def locations(content):
+    return [element.text for element in
+            ElementTree.fromstring(content).iter(f"{NS}loc")]
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    for module in (caching, sitemaps):
+        monkeypatch.setattr(module, "SITEMAP_SHARD_SIZE", 2)
+
+
+def test_index_and_shard_list_visible_posts(client, make_post, mixer):
+    visible = make_post()
+    make_post(is_published=False)
+    make_post(category=mixer.blend("blog.Category", is_published=False))
+    make_post(pub_date=timezone.now() + timedelta(days=1))
+    index = client.get("/sitemap.xml")
+    shard_url = "http://testserver/sitemap-posts-0.xml"
+    assert shard_url in locations(index.content), (
+        "Убедитесь, что индекс sitemap ссылается на файлы разделов."
+    )
+    response = client.get("/sitemap-posts-0.xml")
+    assert response.streaming, "Убедитесь, что файл sitemap отдаётся потоком."
+    content = read(response)
+    assert locations(content) == [
+        f"http://testserver/posts/{visible.id}/"
+    ], "Убедитесь, что в sitemap попадают только видимые публикации."
+    lastmod = ElementTree.fromstring(content).find(
+        f"{NS}url/{NS}lastmod").text
+    assert lastmod == visible.pub_date.isoformat(timespec="seconds")
+
+
+def test_categories_and_profiles(client, published_category, mixer,
+                                 django_user_model):
+    mixer.blend("blog.Category", is_published=False)
+    author = django_user_model.objects.create(username="author")
+    django_user_model.objects.create(username="bad name")
+    content = read(client.get("/sitemap-categories-0.xml"))
+    assert locations(content) == [
+        f"http://testserver/category/{published_category.slug}/"
+    ]
+    content = read(client.get("/sitemap-profiles-0.xml"))
+    assert f"http://testserver/profile/{author.username}/" in (
+        locations(content))
+    assert not any("bad" in url for url in locations(content))
+
+
+def test_posts_are_split_into_shards(client, make_post, small_shards):
+    posts = [make_post() for _ in range(5)]
+    index = locations(client.get("/sitemap.xml").content)
+    shards = [url for url in index if "sitemap-posts-" in url]
+    assert len(shards) == 3, (
+        "Убедитесь, что посты делятся на файлы не больше SITEMAP_SHARD_SIZE"
+        " адресов."
+    )
+    seen = []
+    for url in shards:
+        urls = locations(read(client.get(url)))
+        assert len(urls) <= 2
+        seen.extend(urls)
+    assert seen == [f"http://testserver/posts/{post.id}/" for post in posts]
+
+
+def test_shards_are_read_without_offset(client, make_post, small_shards):
+    for _ in range(3):
+        make_post()
+    with CaptureQueriesContext(connection) as queries:
+        read(client.get("/sitemap-posts-1.xml"))
+    assert not any("OFFSET" in query["sql"].upper().replace("OFFSET 0", "")
+                   for query in queries.captured_queries), (
+        "Убедитесь, что строки sitemap читаются по ключу, без OFFSET."
+    )
+
+
+def test_only_changed_shard_is_rebuilt(client, make_post, small_shards,
+                                       django_assert_max_num_queries):
+    for _ in range(3):
+        make_post()
+    old = read(client.get("/sitemap-posts-0.xml"))
+    read(client.get("/sitemap-posts-1.xml"))
+    with django_assert_max_num_queries(0):
+        cached = client.get("/sitemap-posts-0.xml")
+    assert not cached.streaming and cached.content == old, (
+        "Убедитесь, что файл sitemap берётся из кэша."
+    )
+    make_post()
+    with django_assert_max_num_queries(0):
+        assert client.get("/sitemap-posts-0.xml").content == old
+    assert len(locations(read(client.get("/sitemap-posts-1.xml")))) == 2, (
+        "Убедитесь, что новый пост сбрасывает кэш своего файла sitemap."
+    )
+
+
+def test_scheduled_post_appears_when_due(client, make_post, monkeypatch):
+    make_post()
+    scheduled = make_post(pub_date=timezone.now() + timedelta(hours=1))
+    url = f"http://testserver/posts/{scheduled.id}/"
+    assert url not in locations(read(client.get("/sitemap-posts-0.xml")))
+    later = timezone.now() + timedelta(hours=2)
+    monkeypatch.setattr(sitemaps, "get_publish_now", lambda: later)
+    assert url in locations(read(client.get("/sitemap-posts-0.xml"))), (
+        "Убедитесь, что отложенный пост появляется в sitemap в срок."
+    )
+
+
+def test_conditional_get_and_missing_shards(client, make_post):
+    make_post()
+    response = client.get("/sitemap-posts-0.xml")
+    read(response)
+    repeated = client.get("/sitemap-posts-0.xml",
+                          HTTP_IF_NONE_MATCH=response["ETag"])
+    assert repeated.status_code == HTTPStatus.NOT_MODIFIED
+    assert client.get("/sitemap-posts-5.xml").status_code == (
+        HTTPStatus.NOT_FOUND)
+    assert client.get("/sitemap-users-0.xml").status_code == (
+        HTTPStatus.NOT_FOUND)
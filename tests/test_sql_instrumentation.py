@@ -0,0 +1,84 @@
+import json
+import logging
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from blog import instrumentation
+from blog.middleware import QueryInstrumentationMiddleware
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def clear_recent():
+    instrumentation.RECENT.clear()
+    yield
+    instrumentation.RECENT.clear()
+
+
+def test_fingerprint_normalizes_literals():
+    first = instrumentation.fingerprint(
+        "SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'a'  LIMIT 21")
+    second = instrumentation.fingerprint(
+        "SELECT * FROM t WHERE id IN (%s) AND name = 'b' LIMIT 5")
+    assert first == second == (
+        "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?")
+
+
+def run_queries(times):
+    User = get_user_model()
+
+    def view(request):
+        for pk in range(times):
+            User.objects.filter(pk=pk).first()
+        return HttpResponse()
+
+    request = RequestFactory().get("/n-plus-one/")
+    return QueryInstrumentationMiddleware(view)(request)
+
+
+@override_settings(BLOG_SQL_SAMPLE_RATE=1.0, BLOG_SQL_REPEAT_THRESHOLD=3)
+def test_repeated_fingerprint_is_logged(caplog):
+    with caplog.at_level(logging.WARNING, logger="blog.sql"):
+        run_queries(4)
+    records = [json.loads(record.getMessage()) for record in caplog.records
+               if record.name == "blog.sql"]
+    assert len(records) == 1, (
+        "Убедитесь, что повторяющийся запрос попадает в лог `blog.sql`."
+    )
+    assert records[0]["event"] == "n_plus_one"
+    assert records[0]["count"] == 4
+    entry = instrumentation.RECENT[-1]
+    assert entry["path"] == "/n-plus-one/"
+    assert entry["queries"] == 4
+    assert entry["top"][0]["count"] == 4
+
+
+@override_settings(BLOG_SQL_SAMPLE_RATE=1.0, BLOG_SQL_REPEAT_THRESHOLD=3)
+def test_below_threshold_is_not_logged(caplog):
+    with caplog.at_level(logging.WARNING, logger="blog.sql"):
+        run_queries(3)
+    assert not [r for r in caplog.records if r.name == "blog.sql"]
+
+
+@override_settings(BLOG_SQL_SAMPLE_RATE=0)
+def test_unsampled_requests_are_not_recorded():
+    run_queries(10)
+    assert not instrumentation.RECENT
+
+
+@override_settings(BLOG_SQL_SAMPLE_RATE=1.0)
+def test_query_log_is_debug_and_staff_only(client, admin_client, user_client):
+    user_client.get("/")
+    with override_settings(DEBUG=False):
+        assert admin_client.get("/debug/queries/").status_code == 404
+    with override_settings(DEBUG=True):
+        assert user_client.get("/debug/queries/").status_code == 404
+        response = admin_client.get("/debug/queries/?view=blog:index")
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results and all(
+        entry["view"] == "blog:index" for entry in results)
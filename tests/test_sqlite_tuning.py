@@ -0,0 +1,151 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from django.db import OperationalError, connections, transaction
+
+from blog.db import retry_on_locked
+
+pytestmark = [pytest.mark.django_db]
+
+ALIAS = "stress"
+WRITERS, READERS, ROWS = 4, 4, 40
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    """Отдельная база-файл: у тестовой базы в памяти нет WAL."""
+    path = tmp_path / "stress.sqlite3"
+    connections.databases[ALIAS] = {
+        "ENGINE": "django.db.backends.sqlite3", "NAME": str(path)}
+    connections.ensure_defaults(ALIAS)
+    connections.prepare_test_settings(ALIAS)
+    yield path
+    connections[ALIAS].close()
+    del connections.databases[ALIAS]
+    if hasattr(connections._connections, ALIAS):
+        delattr(connections._connections, ALIAS)
+
+
+def in_thread(target, errors):
+    def run():
+        try:
+            target()
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connections.close_all()
+    return threading.Thread(target=run)
+
+
+def pragma(name):
+    with connections[ALIAS].cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def test_pragmas_are_applied(file_db, settings):
+    expected = settings.BLOG_SQLITE_PRAGMAS
+    assert pragma("journal_mode") == "wal"
+    assert pragma("busy_timeout") == expected["busy_timeout"]
+    assert pragma("cache_size") == expected["cache_size"]
+    assert pragma("synchronous") == 1, "Ожидался synchronous=NORMAL."
+    assert pragma("temp_store") == 2, "Ожидался temp_store=MEMORY."
+    assert settings.DATABASES["default"]["CONN_MAX_AGE"] > 0, (
+        "Убедитесь, что соединения с базой постоянные."
+    )
+
+
+def test_reads_and_writes_proceed_together(file_db):
+    with connections[ALIAS].cursor() as cursor:
+        cursor.execute(
+            "CREATE TABLE entry (id INTEGER PRIMARY KEY, value TEXT)")
+    writing = threading.Event()
+    writing.set()
+    observed, errors = [], []
+
+    @retry_on_locked(using=ALIAS)
+    def insert(value):
+        with transaction.atomic(using=ALIAS):
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute("INSERT INTO entry (value) VALUES (%s)",
+                               [value])
+                time.sleep(0.001)
+
+    def write(number):
+        for row in range(ROWS):
+            insert(f"{number}:{row}")
+
+    def read():
+        while writing.is_set():
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM entry")
+                observed.append(cursor.fetchone()[0])
+
+    writers = [in_thread(lambda number=number: write(number), errors)
+               for number in range(WRITERS)]
+    readers = [in_thread(read, errors) for _ in range(READERS)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    writing.clear()
+    for thread in readers:
+        thread.join()
+    assert errors == [], (
+        "Убедитесь, что одновременные чтение и запись не падают с"
+        " `database is locked`."
+    )
+    assert pragma("journal_mode") == "wal"
+    with connections[ALIAS].cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM entry")
+        assert cursor.fetchone()[0] == WRITERS * ROWS
+    assert any(0 < count < WRITERS * ROWS for count in observed), (
+        "Убедитесь, что чтение идёт во время записи, а не после неё."
+    )
+
+
+def test_locked_write_is_retried(file_db, settings, caplog):
+    settings.BLOG_SQLITE_PRAGMAS = {**settings.BLOG_SQLITE_PRAGMAS,
+                                    "busy_timeout": 1}
+    settings.BLOG_DB_RETRY_DELAY = 0.02
+    with connections[ALIAS].cursor() as cursor:
+        cursor.execute("CREATE TABLE entry (id INTEGER PRIMARY KEY)")
+    connections[ALIAS].close()
+    holder = sqlite3.connect(file_db, isolation_level=None,
+                             check_same_thread=False)
+    holder.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.05, holder.commit).start()
+
+    @retry_on_locked(using=ALIAS)
+    def insert():
+        with transaction.atomic(using=ALIAS):
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute("INSERT INTO entry DEFAULT VALUES")
+
+    insert()
+    holder.close()
+    assert "база занята" in caplog.text, (
+        "Убедитесь, что запись в занятую базу повторяется."
+    )
+    assert pragma("busy_timeout") == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_no_retry_inside_outer_transaction(settings):
+    calls = []
+
+    @retry_on_locked
+    def locked():
+        calls.append(1)
+        raise OperationalError("database is locked")
+
+    with pytest.raises(OperationalError):
+        with transaction.atomic():
+            locked()
+    assert calls == [1]
+    settings.BLOG_DB_RETRY_DELAY = 0
+    with pytest.raises(OperationalError):
+        locked()
+    assert len(calls) == 1 + settings.BLOG_DB_RETRY_ATTEMPTS
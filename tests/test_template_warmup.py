@@ -0,0 +1,55 @@
+import pytest
+from django.conf import settings
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.template.loaders.filesystem import Loader as FilesystemLoader
+from django.test import override_settings
+
+from blog.warmup import warm_templates
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def cached_loader():
+    loader, = engines["django"].engine.template_loaders
+    assert isinstance(loader, CachedLoader), (
+        "Убедитесь, что шаблоны загружает кэширующий загрузчик."
+    )
+    loader.reset()
+    yield loader
+    loader.reset()
+
+
+def test_warmup_compiles_every_template(cached_loader):
+    names = warm_templates()
+    files = list(settings.TEMPLATES_DIR.rglob("*.html"))
+    assert len(names) == len(files)
+    assert {"base.html", "includes/post_card.html",
+            "includes/category_link.html"} <= set(names)
+    assert set(names) <= set(cached_loader.get_template_cache), (
+        "Убедитесь, что прогрев сохраняет шаблоны в кэше загрузчика."
+    )
+
+
+@override_settings(DEBUG=True)
+def test_warm_render_does_not_read_files(
+        cached_loader, client, monkeypatch, mixer, user, published_category,
+        published_location):
+    mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location, is_published=True)
+    warm_templates()
+    reads = []
+    original = FilesystemLoader.get_contents
+
+    def get_contents(self, origin):
+        reads.append(origin.name)
+        return original(self, origin)
+
+    monkeypatch.setattr(FilesystemLoader, "get_contents", get_contents)
+    assert client.get("/").status_code == 200
+    assert reads == [], (
+        "Убедитесь, что после прогрева страница не читает шаблоны с диска"
+        " даже при DEBUG = True."
+    )